@@ -0,0 +1,109 @@
+from typing import List, Tuple, Union
+
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+from onnx_embedder import OnnxEmbedder
+
+
+# Labeled (query, is_ambiguous) pairs synthesized from the few-shot examples
+# in ClaRAEngine's ambiguity prompt
+TRAINING_EXAMPLES: List[Tuple[str, bool]] = [
+    ("What is this document about?", False),
+    ("Summarize the main points", False),
+    ("What are the key findings?", False),
+    ("Tell me about the product warranty", False),
+    ("What is the price of the SmartWidget Pro?", False),
+    ("How long does the battery last?", False),
+    ("What was the revenue in Q3?", False),
+    ("List the setup instructions", False),
+    ("What is the employee retention rate?", False),
+    ("Give me an overview of the report", False),
+    ("What are the company's remote work rules?", False),
+    ("Summarize the financial results", False),
+    ("What benefits do employees get?", False),
+    ("When are timesheets due?", False),
+    ("What is the system uptime?", False),
+    ("Explain the conclusion of the document", False),
+    ("What technical improvements were made?", False),
+    ("What is the dress code?", False),
+    ("What about performance?", True),
+    ("How did it go?", True),
+    ("What does it say about performance?", True),
+    ("What was the performance like?", True),
+    ("Is it good?", True),
+    ("What about the numbers?", True),
+    ("How is it doing?", True),
+    ("What happened?", True),
+    ("Tell me about the results", True),
+    ("Was it better than before?", True),
+    ("What about growth?", True),
+    ("How much did it change?", True),
+    ("Which one is best?", True),
+    ("What about the rate?", True),
+    ("How are things?", True),
+    ("What did they decide?", True),
+]
+
+
+class AmbiguityClassifier:
+    """
+    Local classifier predicting whether a query needs clarification
+
+    A logistic-regression head over the sentence embeddings already used for
+    retrieval, so unambiguous queries skip the LLM ambiguity analysis.
+    """
+
+    def __init__(
+        self,
+        embedding_model: Union[SentenceTransformer, OnnxEmbedder],
+        examples: List[Tuple[str, bool]] = TRAINING_EXAMPLES,
+        learning_rate: float = 0.5,
+        epochs: int = 500,
+        l2: float = 1e-3
+    ):
+        self.embedding_model = embedding_model
+        self.weights, self.bias = self._train(examples, learning_rate, epochs, l2)
+
+    def predict_proba(self, query: str) -> float:
+        """Probability that the query is ambiguous"""
+        return self.predict_proba_embedding(self._embed([query])[0])
+
+    def predict_proba_embedding(self, embedding: np.ndarray) -> float:
+        """Probability that the query with this L2-normalized embedding is ambiguous"""
+        return float(self._sigmoid(np.asarray(embedding, dtype=np.float32) @ self.weights + self.bias))
+
+    def _train(
+        self,
+        examples: List[Tuple[str, bool]],
+        learning_rate: float,
+        epochs: int,
+        l2: float
+    ) -> Tuple[np.ndarray, float]:
+        """Fit the logistic-regression head with batch gradient descent"""
+
+        features = self._embed([query for query, _ in examples])
+        labels = np.array([label for _, label in examples], dtype=np.float32)
+
+        weights = np.zeros(features.shape[1], dtype=np.float32)
+        bias = 0.0
+
+        for _ in range(epochs):
+            error = self._sigmoid(features @ weights + bias) - labels
+            weights -= learning_rate * (features.T @ error / len(labels) + l2 * weights)
+            bias -= learning_rate * float(error.mean())
+
+        return weights, bias
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        """Embed texts as L2-normalized float32 vectors"""
+        return self.embedding_model.encode(
+            texts,
+            show_progress_bar=False,
+            convert_to_numpy=True,
+            normalize_embeddings=True
+        ).astype(np.float32)
+
+    @staticmethod
+    def _sigmoid(x):
+        return 1.0 / (1.0 + np.exp(-x))
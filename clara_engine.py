@@ -1,20 +1,94 @@
-import uuid
-import json
-from typing import List, Dict, Optional, Tuple
-from openai import OpenAI
-from anthropic import Anthropic
+import asyncio
+import functools
+import secrets
+import threading
+import orjson
+import numpy as np
+from typing import Any, AsyncIterator, List, Dict, Optional, Tuple, Type
+import openai
+import anthropic
+from openai import AsyncOpenAI
+from anthropic import AsyncAnthropic
+from aiolimiter import AsyncLimiter
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential_jitter
+from cachetools import TTLCache
+from pydantic import BaseModel
 
 from models import (
     ClarificationQuestion,
     ClarificationResponse,
     AnswerResponse,
     RetrievedDocument,
-    QueryRequest
+    QueryRequest,
+    AmbiguitySchema,
+    AnswerSchema,
+    ClarifyOrAnswerSchema
 )
-from vector_store import VectorStore
+from vector_store import VectorStore, format_retrieved_chunk
+from prompts import (
+    CONFIDENCE_MARKER,
+    AMBIGUITY_INSTRUCTIONS,
+    CLARIFY_OR_ANSWER_INSTRUCTIONS,
+    ANSWER_INSTRUCTIONS,
+    STREAM_ANSWER_INSTRUCTIONS
+)
+from semantic_cache import SemanticCache
+from conversation_store import ConversationStore, InMemoryConversationStore
+from ambiguity_classifier import AmbiguityClassifier
+from rate_limiter import TokenRateLimiter
 from config import settings
 
 
+NO_DOCUMENTS_MESSAGE = "I don't have any documents to search through yet. Please upload some documents first using the upload section on the left."
+
+DEFAULT_SYSTEM_PROMPT = "You are a helpful AI assistant."
+
+# Anthropic model used when LLM_MODEL is left at the OpenAI default
+ANTHROPIC_DEFAULT_MODEL = "claude-haiku-4-5"
+
+# Transient provider errors worth retrying with backoff (InternalServerError
+# covers 5xx responses, including Anthropic's 529 "overloaded")
+RETRYABLE_LLM_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+    anthropic.RateLimitError,
+    anthropic.APIConnectionError,
+    anthropic.InternalServerError
+)
+
+
+@functools.lru_cache(maxsize=None)
+def _strict_json_schema(schema: Type[BaseModel]) -> Dict[str, Any]:
+    """JSON schema for a model in the form required by OpenAI strict structured outputs"""
+
+    def make_strict(node):
+        if isinstance(node, dict):
+            node.pop("default", None)
+            if node.get("type") == "object" and "properties" in node:
+                node["additionalProperties"] = False
+                node["required"] = list(node["properties"])
+            for value in node.values():
+                make_strict(value)
+        elif isinstance(node, list):
+            for item in node:
+                make_strict(item)
+        return node
+
+    return make_strict(schema.model_json_schema())
+
+
+# OpenAI models that predate Structured Outputs (json_schema response format)
+LEGACY_JSON_MODEL_PREFIXES = ("gpt-3.5", "gpt-4-", "gpt-4o-2024-05-13")
+
+
+def _supports_structured_outputs(model: str) -> bool:
+    """Whether an OpenAI-compatible model accepts a strict json_schema response format"""
+    if settings.llm_structured_outputs is not None:
+        return settings.llm_structured_outputs
+    return model != "gpt-4" and not model.startswith(LEGACY_JSON_MODEL_PREFIXES)
+
+
 class ClaRAEngine:
     """
     ClaRA (Clarifying Retrieval-Augmented) Engine
@@ -26,21 +100,66 @@ class ClaRAEngine:
     4. Generate improved answers
     """
 
-    def __init__(self, vector_store: VectorStore):
+    def __init__(
+        self,
+        vector_store: VectorStore,
+        conversation_store: Optional[ConversationStore] = None
+    ):
         self.vector_store = vector_store
-        self.conversations: Dict[str, Dict] = {}
+        # Conversation state; in-memory unless a shared store is injected
+        self.conversation_store: ConversationStore = conversation_store or InMemoryConversationStore(
+            max_conversations=settings.max_conversations,
+            ttl_seconds=settings.conversation_ttl_seconds
+        )
+        self._conversation_locks: TTLCache = TTLCache(
+            maxsize=settings.max_conversations,
+            ttl=settings.conversation_ttl_seconds
+        )
+        # TTLCache mutates on reads (expiry), so guard every access
+        self._conversation_locks_guard = threading.RLock()
+
+        # Bound the number of in-flight LLM requests
+        self._llm_semaphore = asyncio.Semaphore(settings.max_concurrent_requests)
+
+        # Stay under the provider's request and token rate limits
+        self._request_limiter = AsyncLimiter(settings.rpm, 60) if settings.rpm > 0 else None
+        self._token_limiter = TokenRateLimiter(settings.tpm)
+
+        # Semantic caches for LLM responses
+        self.ambiguity_cache: Optional[SemanticCache] = None
+        self.answer_cache: Optional[SemanticCache] = None
+        if settings.enable_semantic_cache:
+            self.ambiguity_cache = self._create_semantic_cache(settings.ambiguity_cache_threshold)
+            self.answer_cache = self._create_semantic_cache(settings.answer_cache_threshold)
+
+        # Local classifier screening queries before LLM ambiguity analysis
+        self.ambiguity_classifier: Optional[AmbiguityClassifier] = None
+        if settings.enable_clarifications and settings.enable_ambiguity_classifier:
+            self.ambiguity_classifier = AmbiguityClassifier(self.vector_store.embedding_model)
 
         # Initialize LLM client
-        if settings.openai_api_key:
-            self.llm_client = OpenAI(api_key=settings.openai_api_key)
+        # (LLM_BASE_URL points the OpenAI client at a compatible server such as vLLM)
+        if settings.openai_api_key or settings.llm_base_url:
+            self.llm_client = AsyncOpenAI(
+                api_key=settings.openai_api_key or "EMPTY",
+                base_url=settings.llm_base_url,
+                # Retries are handled by tenacity in _send_llm_request
+                max_retries=0
+            )
             self.llm_provider = "openai"
         elif settings.anthropic_api_key:
-            self.llm_client = Anthropic(api_key=settings.anthropic_api_key)
+            self.llm_client = AsyncAnthropic(api_key=settings.anthropic_api_key, max_retries=0)
             self.llm_provider = "anthropic"
+            # Fail at startup rather than on the first query
+            self._anthropic_model()
         else:
-            raise ValueError("No LLM API key provided. Set either OPENAI_API_KEY or ANTHROPIC_API_KEY")
+            raise ValueError("No LLM API key provided. Set either OPENAI_API_KEY or ANTHROPIC_API_KEY, or LLM_BASE_URL for a self-hosted server")
+
+        # Streams cannot be retried once text has been yielded, so opening them
+        # keeps the SDK's own retries (which only cover the initial request)
+        self.llm_stream_client = self.llm_client.with_options(max_retries=2)
 
-    def process_query(self, query_request: QueryRequest) -> Tuple[Optional[ClarificationResponse], Optional[AnswerResponse]]:
+    async def process_query(self, query_request: QueryRequest) -> Tuple[Optional[ClarificationResponse], Optional[AnswerResponse]]:
         """
         Process a query using ClaRA approach
 
@@ -49,39 +168,30 @@ class ClaRAEngine:
             - AnswerResponse if query can be answered directly
         """
 
-        # Get or create conversation
-        conv_id = query_request.conversation_id or str(uuid.uuid4())
+        conv_id, conversation = await self._start_conversation(query_request)
 
-        if conv_id not in self.conversations:
-            self.conversations[conv_id] = {
-                "query": query_request.query,
-                "clarifications": {},
-                "history": []
-            }
+        # Embed the query once for the classifier, retrieval and the semantic caches
+        query_embedding = await self._embed_query(query_request.query)
 
-        # Update clarifications if provided
-        if query_request.clarifications:
-            self.conversations[conv_id]["clarifications"].update(query_request.clarifications)
+        needs_analysis = await self._may_need_clarification(query_request, query_embedding)
 
         # Step 1: Check if we need clarifications
-        if settings.enable_clarifications and not query_request.clarifications:
-            needs_clarification, clarification_response = self._analyze_query_ambiguity(
+        # (folded into answer generation when the combined single-call path is enabled)
+        if needs_analysis and not settings.combine_clarification_and_answer:
+            needs_clarification, clarification_response = await self._analyze_query_ambiguity(
                 query_request.query,
-                conv_id
+                conv_id,
+                query_embedding
             )
 
             if needs_clarification:
                 return clarification_response, None
 
         # Step 2: Perform retrieval (refined if we have clarifications)
-        refined_query = self._refine_query_with_clarifications(
+        retrieved_docs = await self._retrieve(
             query_request.query,
-            self.conversations[conv_id]["clarifications"]
-        )
-
-        retrieved_docs = self.vector_store.search(
-            query=refined_query,
-            top_k=settings.top_k_documents
+            conversation["clarifications"],
+            query_embedding
         )
 
         # Check if we found any documents
@@ -89,97 +199,300 @@ class ClaRAEngine:
             # No documents in database
             answer_response = AnswerResponse(
                 conversation_id=conv_id,
-                answer="I don't have any documents to search through yet. Please upload some documents first using the upload section on the left.",
+                answer=NO_DOCUMENTS_MESSAGE,
                 sources=[],
                 confidence_score=0.0,
                 used_clarifications=False
             )
             return None, answer_response
 
-        # Step 3: Generate answer
-        answer_response = self._generate_answer(
+        # Step 3: Generate answer, or clarify and answer in a single LLM call
+        if needs_analysis and settings.combine_clarification_and_answer:
+            return await self._analyze_and_answer(
+                query=query_request.query,
+                retrieved_docs=retrieved_docs,
+                conv_id=conv_id,
+                query_embedding=query_embedding
+            )
+
+        answer_response = await self._generate_answer(
             query=query_request.query,
             retrieved_docs=retrieved_docs,
-            clarifications=self.conversations[conv_id]["clarifications"],
-            conv_id=conv_id
+            clarifications=conversation["clarifications"],
+            conv_id=conv_id,
+            query_embedding=query_embedding
         )
 
         return None, answer_response
 
-    def _analyze_query_ambiguity(
-        self,
-        query: str,
-        conv_id: str
-    ) -> Tuple[bool, Optional[ClarificationResponse]]:
-        """Analyze if query needs clarification"""
+    async def stream_query(self, query_request: QueryRequest) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Process a query using ClaRA approach, streaming the answer
 
-        prompt = f"""You are an AI assistant analyzing user queries for ambiguity in a RAG system.
+        Yields (event, data) pairs:
+            - ("clarification", ClarificationResponse) if clarifications are needed
+            - ("sources", List[RetrievedDocument]) before the answer
+            - ("token", str) for each answer text delta
+            - ("done", dict) with conversation_id, confidence_score and used_clarifications
+        """
 
-Query: "{query}"
+        conv_id, conversation = await self._start_conversation(query_request)
+        clarifications = conversation["clarifications"]
 
-IMPORTANT: Only request clarification if the query is TRULY ambiguous with multiple completely different meanings.
-Simple, clear questions should NOT need clarification even if they're broad.
+        # Embed the query once for the classifier, retrieval and the semantic cache
+        query_embedding = await self._embed_query(query_request.query)
 
-Examples of queries that DON'T need clarification:
-- "What is this document about?"
-- "Summarize the main points"
-- "What are the key findings?"
-- "Tell me about X" (where X is a clear topic)
+        # The combined clarify-or-answer envelope cannot be rendered incrementally,
+        # so streaming always decides on clarifications up front
+        if await self._may_need_clarification(query_request, query_embedding):
+            needs_clarification, clarification_response = await self._analyze_query_ambiguity(
+                query_request.query,
+                conv_id,
+                query_embedding
+            )
 
-Examples that DO need clarification:
-- "What about performance?" (could be system/financial/employee performance)
-- "How did it go?" (too vague, unclear what "it" refers to)
+            if needs_clarification:
+                yield "clarification", clarification_response
+                return
 
-Analyze this query and determine if it TRULY needs clarification.
+        retrieved_docs = await self._retrieve(query_request.query, clarifications, query_embedding)
+        yield "sources", retrieved_docs
 
-Respond in JSON format:
-{{
-    "needs_clarification": true/false,
-    "reasoning": "why clarification is/isn't needed",
-    "questions": [
-        {{
-            "question_text": "the clarifying question",
-            "question_type": "open" or "multiple_choice",
-            "suggested_options": ["option1", "option2"] (only for multiple_choice)
-        }}
-    ]
-}}
+        if not retrieved_docs:
+            yield "token", NO_DOCUMENTS_MESSAGE
+            yield "done", {
+                "conversation_id": conv_id,
+                "confidence_score": 0.0,
+                "used_clarifications": False
+            }
+            return
 
-Be conservative - when in doubt, set needs_clarification to false.
-"""
+        prompt = self._format_user_prompt(
+            query_request.query,
+            self._format_clarifications(clarifications),
+            self._format_context(retrieved_docs)
+        )
+
+        # Hold back any trailing text that may be the start of the confidence line
+        confidence_score = 0.5
+        buffer = ""
+        async for delta in self._call_llm_stream(prompt, STREAM_ANSWER_INSTRUCTIONS):
+            buffer += delta
+            tail = buffer[buffer.rfind("\n") + 1:]
+            if CONFIDENCE_MARKER.startswith(tail) or tail.startswith(CONFIDENCE_MARKER):
+                emit, buffer = buffer[:len(buffer) - len(tail)], tail
+            else:
+                emit, buffer = buffer, ""
+            if emit:
+                yield "token", emit
+
+        if buffer.startswith(CONFIDENCE_MARKER):
+            try:
+                confidence_score = float(buffer[len(CONFIDENCE_MARKER):].strip())
+            except ValueError:
+                pass
+        elif buffer:
+            yield "token", buffer
+
+        yield "done", {
+            "conversation_id": conv_id,
+            "confidence_score": confidence_score,
+            "used_clarifications": bool(clarifications)
+        }
+
+    async def _embed_query(self, query: str) -> np.ndarray:
+        """Embed a query off the event loop, batched with concurrent queries"""
+        return (await self.vector_store.query_batcher.embed([query]))[0]
+
+    async def _may_need_clarification(self, query_request: QueryRequest, query_embedding: np.ndarray) -> bool:
+        """Check whether a query should go through LLM ambiguity analysis"""
+
+        if not settings.enable_clarifications or query_request.clarifications:
+            return False
+
+        # Only queries the local classifier flags as ambiguous reach the LLM
+        if self.ambiguity_classifier is not None:
+            return self.ambiguity_classifier.predict_proba_embedding(query_embedding) > settings.ambiguity_classifier_threshold
+
+        return True
+
+    async def _start_conversation(self, query_request: QueryRequest) -> Tuple[str, Dict]:
+        """Get or create the conversation for a query and record its clarifications"""
+
+        conv_id = query_request.conversation_id or secrets.token_hex(16)
+
+        async with self._get_conversation_lock(conv_id):
+            conversation = await self.conversation_store.get(conv_id)
+            if conversation is None:
+                conversation = {
+                    "query": query_request.query,
+                    "clarifications": {},
+                    "history": []
+                }
+                await self.conversation_store.set(conv_id, conversation)
+
+            # Update clarifications if provided
+            if query_request.clarifications:
+                await self.conversation_store.update_clarifications(conv_id, query_request.clarifications)
+                conversation["clarifications"].update(query_request.clarifications)
+
+        return conv_id, conversation
+
+    async def _retrieve(
+        self,
+        query: str,
+        clarifications: Dict[str, str],
+        query_embedding: Optional[np.ndarray] = None
+    ) -> List[RetrievedDocument]:
+        """Retrieve documents for a query refined with clarifications"""
+
+        refined_query = self._refine_query_with_clarifications(query, clarifications)
+
+        # The original query's embedding only applies while nothing refines it
+        return await self.vector_store.search(
+            query=refined_query,
+            top_k=settings.top_k_documents,
+            query_embedding=None if clarifications else query_embedding
+        )
+
+    async def _analyze_query_ambiguity(
+        self,
+        query: str,
+        conv_id: str,
+        query_embedding: Optional[np.ndarray] = None
+    ) -> Tuple[bool, Optional[ClarificationResponse]]:
+        """Analyze if query needs clarification"""
 
-        response_text = self._call_llm(prompt)
+        prompt = f'Query: "{query}"'
+
+        response_text = await self._call_llm(
+            prompt,
+            system_prompt=AMBIGUITY_INSTRUCTIONS,
+            schema=AmbiguitySchema,
+            cache=self.ambiguity_cache,
+            cache_key=query,
+            cache_embedding=query_embedding
+        )
 
         try:
             # Parse JSON response
-            response_json = json.loads(response_text)
+            response_json = orjson.loads(response_text)
 
             if response_json.get("needs_clarification", False):
-                questions = []
-                for idx, q in enumerate(response_json.get("questions", [])):
-                    question = ClarificationQuestion(
-                        question_id=f"{conv_id}_q{idx}",
-                        question_text=q["question_text"],
-                        question_type=q.get("question_type", "open"),
-                        suggested_options=q.get("suggested_options")
-                    )
-                    questions.append(question)
-
-                clarification_response = ClarificationResponse(
-                    conversation_id=conv_id,
-                    needs_clarification=True,
-                    questions=questions,
-                    reasoning=response_json.get("reasoning")
+                clarification_response = self._build_clarification_response(
+                    conv_id,
+                    response_json
                 )
 
                 return True, clarification_response
 
-        except json.JSONDecodeError:
+        except orjson.JSONDecodeError:
             # If parsing fails, assume no clarification needed
             pass
 
         return False, None
 
+    async def _analyze_and_answer(
+        self,
+        query: str,
+        retrieved_docs: List[RetrievedDocument],
+        conv_id: str,
+        query_embedding: Optional[np.ndarray] = None
+    ) -> Tuple[Optional[ClarificationResponse], Optional[AnswerResponse]]:
+        """Decide between clarifying and answering with a single LLM call"""
+
+        context = self._format_context(retrieved_docs)
+
+        prompt = self._format_user_prompt(query, "", context)
+
+        response_text = await self._call_llm(
+            prompt,
+            system_prompt=CLARIFY_OR_ANSWER_INSTRUCTIONS,
+            schema=ClarifyOrAnswerSchema,
+            cache=self.answer_cache,
+            cache_key=query,
+            cache_embedding=query_embedding,
+            cache_namespace=("combined",) + tuple(doc.chunk.chunk_id for doc in retrieved_docs)
+        )
+
+        try:
+            response_json = orjson.loads(response_text)
+        except orjson.JSONDecodeError:
+            # Fallback if JSON parsing fails: treat the raw text as the answer
+            return None, AnswerResponse(
+                conversation_id=conv_id,
+                answer=response_text,
+                sources=retrieved_docs,
+                confidence_score=0.5,
+                used_clarifications=False
+            )
+
+        if response_json.get("mode") == "clarify" and response_json.get("questions"):
+            return self._build_clarification_response(conv_id, response_json), None
+
+        # A clarify response without questions carries no answer; generate one separately
+        if not response_json.get("answer"):
+            return None, await self._generate_answer(query, retrieved_docs, {}, conv_id, query_embedding)
+
+        return None, AnswerResponse(
+            conversation_id=conv_id,
+            answer=response_json["answer"],
+            sources=retrieved_docs,
+            confidence_score=response_json.get("confidence_score", 0.5),
+            used_clarifications=False
+        )
+
+    def _build_clarification_response(
+        self,
+        conv_id: str,
+        response_json: Dict
+    ) -> ClarificationResponse:
+        """Build a ClarificationResponse from a parsed LLM response"""
+
+        questions = []
+        for idx, q in enumerate(response_json.get("questions", [])):
+            question = ClarificationQuestion(
+                question_id=f"{conv_id}_q{idx}",
+                question_text=q["question_text"],
+                question_type=q.get("question_type", "open"),
+                suggested_options=q.get("suggested_options")
+            )
+            questions.append(question)
+
+        return ClarificationResponse(
+            conversation_id=conv_id,
+            needs_clarification=True,
+            questions=questions,
+            reasoning=response_json.get("reasoning")
+        )
+
+    def _format_context(self, retrieved_docs: List[RetrievedDocument]) -> str:
+        """Format retrieved documents as prompt context"""
+        return "\n\n".join(
+            f"[Document {i+1}] {doc.formatted or format_retrieved_chunk(doc.relevance_score, doc.chunk.content)}"
+            for i, doc in enumerate(retrieved_docs)
+        )
+
+    def _format_user_prompt(self, query: str, clarifications_text: str, context: str) -> str:
+        """Format the per-request part of an answer prompt"""
+        return f"""User Query: {query}
+{clarifications_text}
+
+Retrieved Context:
+{context}
+"""
+
+    def _format_clarifications(self, clarifications: Dict[str, str]) -> str:
+        """Format user clarifications for the answer prompt"""
+
+        clarifications_text = ""
+        if clarifications:
+            clarifications_text = "\n\nUser Clarifications:\n"
+            for q_id, answer in clarifications.items():
+                clarifications_text += f"- {answer}\n"
+
+        return clarifications_text
+
     def _refine_query_with_clarifications(
         self,
         original_query: str,
@@ -198,61 +511,38 @@ Be conservative - when in doubt, set needs_clarification to false.
 
         return refined_query
 
-    def _generate_answer(
+    async def _generate_answer(
         self,
         query: str,
         retrieved_docs: List[RetrievedDocument],
         clarifications: Dict[str, str],
-        conv_id: str
+        conv_id: str,
+        query_embedding: Optional[np.ndarray] = None
     ) -> AnswerResponse:
         """Generate final answer using retrieved documents"""
 
         # Prepare context from retrieved documents
-        context = "\n\n".join([
-            f"[Document {i+1}] (Relevance: {doc.relevance_score:.2f})\n{doc.chunk.content}"
-            for i, doc in enumerate(retrieved_docs)
-        ])
+        context = self._format_context(retrieved_docs)
 
         # Prepare clarifications text
-        clarifications_text = ""
-        if clarifications:
-            clarifications_text = "\n\nUser Clarifications:\n"
-            for q_id, answer in clarifications.items():
-                clarifications_text += f"- {answer}\n"
-
-        prompt = f"""You are a helpful AI assistant answering questions based on provided documents.
-
-User Query: {query}
-{clarifications_text}
-
-Retrieved Context:
-{context}
-
-Instructions:
-1. Answer the query using the information from the retrieved context above
-2. Be helpful, clear, and specific in your answer
-3. If the context contains relevant information, provide a comprehensive answer
-4. If the context doesn't fully answer the question, provide what information is available and mention what's missing
-5. Provide a confidence score based on how well the context answers the question:
-   - 0.9-1.0: Excellent coverage, clear answer
-   - 0.7-0.9: Good coverage, mostly answered
-   - 0.5-0.7: Partial information available
-   - 0.0-0.5: Limited or no relevant information
-
-Respond in JSON format:
-{{
-    "answer": "your detailed, helpful answer",
-    "confidence_score": 0.0-1.0,
-    "reasoning": "brief explanation of your confidence level"
-}}
-
-IMPORTANT: Be helpful and provide useful answers. Don't be overly restrictive.
-"""
-
-        response_text = self._call_llm(prompt)
+        clarifications_text = self._format_clarifications(clarifications)
+
+        prompt = self._format_user_prompt(query, clarifications_text, context)
+
+        # Answers are only reused for the same retrieved chunks
+        response_text = await self._call_llm(
+            prompt,
+            system_prompt=ANSWER_INSTRUCTIONS,
+            schema=AnswerSchema,
+            cache=self.answer_cache,
+            cache_key=f"{query}\n{clarifications_text}",
+            # Without clarifications the key is the query itself
+            cache_embedding=None if clarifications else query_embedding,
+            cache_namespace=tuple(doc.chunk.chunk_id for doc in retrieved_docs)
+        )
 
         try:
-            response_json = json.loads(response_text)
+            response_json = orjson.loads(response_text)
 
             answer_response = AnswerResponse(
                 conversation_id=conv_id,
@@ -264,7 +554,7 @@ IMPORTANT: Be helpful and provide useful answers. Don't be overly restrictive.
 
             return answer_response
 
-        except json.JSONDecodeError:
+        except orjson.JSONDecodeError:
             # Fallback if JSON parsing fails
             return AnswerResponse(
                 conversation_id=conv_id,
@@ -274,40 +564,226 @@ IMPORTANT: Be helpful and provide useful answers. Don't be overly restrictive.
                 used_clarifications=bool(clarifications)
             )
 
-    def _call_llm(self, prompt: str) -> str:
-        """Call LLM API"""
+    async def _call_llm(
+        self,
+        prompt: str,
+        system_prompt: str = DEFAULT_SYSTEM_PROMPT,
+        schema: Optional[Type[BaseModel]] = None,
+        cache: Optional[SemanticCache] = None,
+        cache_key: Optional[str] = None,
+        cache_embedding: Optional[np.ndarray] = None,
+        cache_namespace: Optional[Tuple] = None
+    ) -> str:
+        """Call LLM API, serving semantically similar requests from cache
+
+        When a schema is given the response is constrained to JSON matching it.
+        cache_embedding, if given, is the embedding of the cache key.
+        """
+
+        if cache is not None:
+            # Embed the key once, off the event loop, for both lookup and store
+            if cache_embedding is None:
+                cache_embedding = await self._embed_query(cache_key or prompt)
+            cached = cache.get(cache_embedding, cache_namespace)
+            if cached is not None:
+                return cached
+
+        response_text = await self._send_llm_request(prompt, system_prompt, schema)
+
+        if cache is not None:
+            cache.set(cache_embedding, response_text, cache_namespace)
+
+        return response_text
+
+    @retry(
+        stop=stop_after_attempt(5),
+        wait=wait_exponential_jitter(initial=1, max=30),
+        retry=retry_if_exception_type(RETRYABLE_LLM_ERRORS),
+        reraise=True
+    )
+    async def _send_llm_request(
+        self,
+        prompt: str,
+        system_prompt: str = DEFAULT_SYSTEM_PROMPT,
+        schema: Optional[Type[BaseModel]] = None
+    ) -> str:
+        """Send a request to the configured LLM provider, retrying transient errors
+
+        The concurrency slot is held per attempt, not through the backoff between them.
+        """
+        async with self._llm_semaphore:
+            return await self._request_llm(prompt, system_prompt, schema)
+
+    async def _request_llm(
+        self,
+        prompt: str,
+        system_prompt: str,
+        schema: Optional[Type[BaseModel]]
+    ) -> str:
+        """Send a single request to the configured LLM provider"""
+
+        await self._acquire_rate_limit()
 
         if self.llm_provider == "openai":
-            response = self.llm_client.chat.completions.create(
+            # Structured outputs guarantee JSON matching the schema; older models
+            # get JSON mode with the schema spelled out in the prompt instead
+            extra_args = {}
+            if schema is not None and _supports_structured_outputs(settings.llm_model):
+                extra_args["response_format"] = {
+                    "type": "json_schema",
+                    "json_schema": {
+                        "name": schema.__name__,
+                        "schema": _strict_json_schema(schema),
+                        "strict": True
+                    }
+                }
+            elif schema is not None:
+                extra_args["response_format"] = {"type": "json_object"}
+                prompt = (
+                    f"{prompt}\n\nRespond with a single JSON object matching this JSON schema:\n"
+                    f"{orjson.dumps(_strict_json_schema(schema)).decode()}"
+                )
+
+            response = await self.llm_client.chat.completions.create(
                 model=settings.llm_model,
-                messages=[
-                    {"role": "system", "content": "You are a helpful AI assistant."},
-                    {"role": "user", "content": prompt}
-                ],
+                messages=self._openai_messages(prompt, system_prompt),
                 temperature=settings.llm_temperature,
-                max_tokens=settings.max_tokens
+                max_tokens=settings.max_tokens,
+                **extra_args
             )
+            if response.usage:
+                self._token_limiter.record(response.usage.total_tokens)
             return response.choices[0].message.content
 
         elif self.llm_provider == "anthropic":
-            response = self.llm_client.messages.create(
-                model=settings.llm_model.replace("gpt-4-turbo-preview", "claude-3-opus-20240229"),
+            # Forced tool use returns the schema-shaped input as structured output
+            extra_args = {}
+            if schema is not None:
+                extra_args["tools"] = [{
+                    "name": schema.__name__,
+                    "description": schema.__doc__ or schema.__name__,
+                    "input_schema": schema.model_json_schema()
+                }]
+                extra_args["tool_choice"] = {"type": "tool", "name": schema.__name__}
+
+            response = await self.llm_client.messages.create(
+                model=self._anthropic_model(),
                 max_tokens=settings.max_tokens,
                 temperature=settings.llm_temperature,
+                system=self._anthropic_system(system_prompt),
                 messages=[
                     {"role": "user", "content": prompt}
-                ]
+                ],
+                **extra_args
             )
+            self._token_limiter.record(response.usage.input_tokens + response.usage.output_tokens)
+
+            for block in response.content:
+                if block.type == "tool_use":
+                    return orjson.dumps(block.input).decode()
             return response.content[0].text
 
         else:
             raise ValueError(f"Unknown LLM provider: {self.llm_provider}")
 
-    def clear_conversation(self, conv_id: str) -> None:
+    async def _call_llm_stream(
+        self,
+        prompt: str,
+        system_prompt: str = DEFAULT_SYSTEM_PROMPT
+    ) -> AsyncIterator[str]:
+        """Call LLM API, yielding text deltas as they arrive"""
+
+        async with self._llm_semaphore:
+            await self._acquire_rate_limit()
+
+            if self.llm_provider == "openai":
+                stream = await self.llm_stream_client.chat.completions.create(
+                    model=settings.llm_model,
+                    messages=self._openai_messages(prompt, system_prompt),
+                    temperature=settings.llm_temperature,
+                    max_tokens=settings.max_tokens,
+                    stream=True,
+                    stream_options={"include_usage": True}
+                )
+                async for chunk in stream:
+                    if chunk.usage:
+                        self._token_limiter.record(chunk.usage.total_tokens)
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+
+            elif self.llm_provider == "anthropic":
+                async with self.llm_stream_client.messages.stream(
+                    model=self._anthropic_model(),
+                    max_tokens=settings.max_tokens,
+                    temperature=settings.llm_temperature,
+                    system=self._anthropic_system(system_prompt),
+                    messages=[
+                        {"role": "user", "content": prompt}
+                    ]
+                ) as stream:
+                    async for text in stream.text_stream:
+                        yield text
+                    usage = (await stream.get_final_message()).usage
+                    self._token_limiter.record(usage.input_tokens + usage.output_tokens)
+
+            else:
+                raise ValueError(f"Unknown LLM provider: {self.llm_provider}")
+
+    async def _acquire_rate_limit(self) -> None:
+        """Wait for request and token budget before calling the provider"""
+        await self._token_limiter.wait()
+        if self._request_limiter is not None:
+            await self._request_limiter.acquire()
+
+    def _openai_messages(self, prompt: str, system_prompt: str) -> List[Dict[str, str]]:
+        """Build OpenAI chat messages, static system prompt first for prefix caching"""
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": prompt}
+        ]
+
+    def _anthropic_system(self, system_prompt: str) -> List[Dict[str, Any]]:
+        """Build the Anthropic system prompt, marked for prompt caching"""
+        return [{
+            "type": "text",
+            "text": system_prompt,
+            "cache_control": {"type": "ephemeral"}
+        }]
+
+    def _anthropic_model(self) -> str:
+        """Map the configured model name to an Anthropic model"""
+
+        # The small OpenAI default maps to a comparably small Claude model
+        if settings.llm_model == "gpt-4o-mini":
+            return ANTHROPIC_DEFAULT_MODEL
+
+        if not settings.llm_model.startswith("claude-"):
+            raise ValueError(
+                f"LLM_MODEL={settings.llm_model} is not an Anthropic model; set LLM_MODEL to a Claude "
+                f"model such as {ANTHROPIC_DEFAULT_MODEL} when using ANTHROPIC_API_KEY"
+            )
+        return settings.llm_model
+
+    def _create_semantic_cache(self, threshold: float) -> SemanticCache:
+        """Create a semantic cache backed by the vector store's embedding model"""
+        return SemanticCache(
+            dim=self.vector_store.embedding_model.get_sentence_embedding_dimension(),
+            threshold=threshold,
+            max_size=settings.semantic_cache_max_size,
+            ttl_seconds=settings.semantic_cache_ttl_seconds
+        )
+
+    def _get_conversation_lock(self, conv_id: str) -> asyncio.Lock:
+        """Get the lock guarding updates to a conversation"""
+        with self._conversation_locks_guard:
+            return self._conversation_locks.setdefault(conv_id, asyncio.Lock())
+
+    async def clear_conversation(self, conv_id: str) -> None:
         """Clear a conversation history"""
-        if conv_id in self.conversations:
-            del self.conversations[conv_id]
+        await self.conversation_store.delete(conv_id)
+        with self._conversation_locks_guard:
+            self._conversation_locks.pop(conv_id, None)
 
-    def get_conversation(self, conv_id: str) -> Optional[Dict]:
+    async def get_conversation(self, conv_id: str) -> Optional[Dict]:
         """Get conversation data"""
-        return self.conversations.get(conv_id)
+        return await self.conversation_store.get(conv_id)
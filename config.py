@@ -18,19 +18,86 @@ class Settings(BaseSettings):
 
     # Model Configuration
     embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"
-    llm_model: str = "gpt-4-turbo-preview"
+    embedding_batch_size: int = 64
+    # Queries up to this many tokens are embedded padded to exactly this length
+    query_token_length: int = 64
+    # Length-sorted encode batches are capped at this many padded tokens
+    embedding_token_budget: int = 4096
+    # Concurrent embedding requests are merged up to this many (approximate) tokens
+    embedding_batch_max_tokens: int = 8192
+    embedding_batch_linger_ms: float = 10.0
+    # Directory with an INT8 ONNX export (see export_embedder.py); None uses PyTorch
+    onnx_embedding_dir: Optional[str] = None
+    enable_embedding_cache: bool = True
+    # torch.compile the embedding model at startup (CUDA only)
+    compile_embedding_model: bool = True
+    llm_model: str = "gpt-4o-mini"
+    # Strict json_schema outputs; None detects support from the model name, and
+    # models without it fall back to JSON mode with the schema in the prompt
+    llm_structured_outputs: Optional[bool] = None
+    # OpenAI-compatible endpoint (e.g. a self-hosted vLLM server); None uses OpenAI
+    llm_base_url: Optional[str] = None
     llm_temperature: float = 0.7
     max_tokens: int = 2000
 
+    # Document Processing
+    # Documents longer than this are chunked with the compiled splitter
+    fast_split_min_chars: int = 100_000
+
     # ClaRA Settings
     enable_clarifications: bool = True
     max_clarification_questions: int = 3
     similarity_threshold: float = 0.7
+    # Screen queries with a local classifier before asking the LLM about ambiguity
+    enable_ambiguity_classifier: bool = True
+    ambiguity_classifier_threshold: float = 0.6
     top_k_documents: int = 5
+    # Re-rank top_k * multiplier candidates with int8-quantized embeddings. Off by
+    # default: both indexes already return exact float32 cosine distances
+    enable_int8_rerank: bool = False
+    rerank_candidates_multiplier: int = 4
+    # Split ChromaDB into this many collections by document id; filtered searches fan out
+    # across them in parallel. Changing it requires re-uploading documents
+    chroma_shards: int = 1
+    # Serve unfiltered searches from an in-process FAISS HNSW index
+    enable_faiss_index: bool = True
+    faiss_hnsw_m: int = 32
+    # The FAISS index file is rewritten at most this often (and on shutdown)
+    faiss_save_interval_seconds: float = 60.0
+    # Buffer uploaded chunks and write them to the indexes in batches
+    write_batch_size: int = 1024
+    write_flush_interval_seconds: float = 2.0
+    # Reuse retrieval results for near-identical recent queries
+    enable_query_result_cache: bool = True
+    query_result_cache_size: int = 1024
+    query_result_cache_threshold: float = 0.97
+    # Clarify-or-answer in one LLM call instead of ambiguity analysis + answer
+    combine_clarification_and_answer: bool = True
+
+    # Conversation Settings
+    max_conversations: int = 10_000
+    conversation_ttl_seconds: int = 3600
+    # Keep conversations in Redis across restarts; None keeps them in memory
+    redis_url: Optional[str] = None
+
+    # LLM Concurrency
+    max_concurrent_requests: int = 32
+    # Provider rate limits (requests / tokens per minute); 0 disables
+    rpm: int = 500
+    tpm: int = 150_000
+
+    # Semantic Cache Settings
+    enable_semantic_cache: bool = True
+    semantic_cache_max_size: int = 1000
+    semantic_cache_ttl_seconds: float = 300.0
+    ambiguity_cache_threshold: float = 0.95
+    answer_cache_threshold: float = 0.85
 
     # Server Settings
     host: str = "0.0.0.0"
     port: int = 8000
+    # Server processes when DEBUG is off; only 1 is supported (storage is per process)
+    workers: int = 1
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,70 @@
+import mmap
+import os
+import threading
+from typing import List, Optional, Tuple
+
+
+class ContentStore:
+    """
+    Append-only file of chunk texts read back through mmap
+
+    Texts are stored UTF-8 encoded back to back; callers keep the returned
+    (offset, length) pairs and decode only the chunks they need. Space of
+    deleted chunks is not reclaimed until the store is cleared.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "ab+")
+        self._mmap: Optional[mmap.mmap] = None
+
+    def append(self, texts: List[str]) -> List[Tuple[int, int]]:
+        """Append texts, returning the (offset, length) of each"""
+
+        encoded = [text.encode("utf-8") for text in texts]
+
+        with self._lock:
+            self._file.seek(0, os.SEEK_END)
+            offset = self._file.tell()
+            self._file.write(b"".join(encoded))
+            self._file.flush()
+
+        spans = []
+        for data in encoded:
+            spans.append((offset, len(data)))
+            offset += len(data)
+        return spans
+
+    def read(self, offset: int, length: int) -> str:
+        """Decode the text stored at offset"""
+
+        if length == 0:
+            return ""
+
+        with self._lock:
+            # Remap once the file has grown past the current mapping
+            if self._mmap is None or offset + length > len(self._mmap):
+                self._remap()
+            return self._mmap[offset:offset + length].decode("utf-8")
+
+    def clear(self) -> None:
+        """Discard all stored texts"""
+        with self._lock:
+            self._close_mmap()
+            self._file.truncate(0)
+
+    def close(self) -> None:
+        """Close the mapping and the underlying file"""
+        with self._lock:
+            self._close_mmap()
+            self._file.close()
+
+    def _remap(self) -> None:
+        self._close_mmap()
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _close_mmap(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
@@ -0,0 +1,120 @@
+import threading
+from typing import Dict, Optional, Protocol
+
+import orjson
+import redis.asyncio as redis
+from cachetools import TTLCache
+
+
+class ConversationStore(Protocol):
+    """Storage for ClaRA conversation state"""
+
+    async def get(self, conv_id: str) -> Optional[Dict]:
+        """Get a conversation, refreshing its expiry"""
+        ...
+
+    async def set(self, conv_id: str, data: Dict) -> None:
+        """Create or replace a conversation"""
+        ...
+
+    async def update_clarifications(self, conv_id: str, clarifications: Dict[str, str]) -> None:
+        """Merge clarifications into a conversation"""
+        ...
+
+    async def delete(self, conv_id: str) -> None:
+        """Delete a conversation"""
+        ...
+
+
+class InMemoryConversationStore:
+    """Process-local conversation store with TTL expiry and bounded size"""
+
+    def __init__(self, max_conversations: int, ttl_seconds: int):
+        self._conversations: TTLCache = TTLCache(maxsize=max_conversations, ttl=ttl_seconds)
+        # TTLCache mutates on reads (expiry), so guard every access
+        self._lock = threading.RLock()
+
+    async def get(self, conv_id: str) -> Optional[Dict]:
+        with self._lock:
+            conversation = self._conversations.get(conv_id)
+            if conversation is not None:
+                # Re-inserting refreshes the conversation's TTL
+                self._conversations[conv_id] = conversation
+            return conversation
+
+    async def set(self, conv_id: str, data: Dict) -> None:
+        with self._lock:
+            self._conversations[conv_id] = data
+
+    async def update_clarifications(self, conv_id: str, clarifications: Dict[str, str]) -> None:
+        with self._lock:
+            conversation = self._conversations.get(conv_id)
+            if conversation is not None:
+                conversation["clarifications"].update(clarifications)
+
+    async def delete(self, conv_id: str) -> None:
+        with self._lock:
+            self._conversations.pop(conv_id, None)
+
+
+class RedisConversationStore:
+    """
+    Redis-backed conversation store that outlives the server process
+
+    Each conversation is a hash (query, history) plus a separate hash of
+    clarifications so updates merge atomically with HSET.
+    """
+
+    def __init__(self, url: str, ttl_seconds: int, key_prefix: str = "clara:conversation:"):
+        self.client = redis.from_url(url, decode_responses=True)
+        self.ttl_seconds = ttl_seconds
+        self.key_prefix = key_prefix
+
+    def _keys(self, conv_id: str):
+        key = f"{self.key_prefix}{conv_id}"
+        return key, f"{key}:clarifications"
+
+    async def get(self, conv_id: str) -> Optional[Dict]:
+        key, clarifications_key = self._keys(conv_id)
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.hgetall(key)
+            pipe.hgetall(clarifications_key)
+            pipe.expire(key, self.ttl_seconds)
+            pipe.expire(clarifications_key, self.ttl_seconds)
+            data, clarifications, _, _ = await pipe.execute()
+
+        if not data:
+            return None
+
+        return {
+            "query": data.get("query", ""),
+            "clarifications": clarifications,
+            "history": orjson.loads(data.get("history", "[]"))
+        }
+
+    async def set(self, conv_id: str, data: Dict) -> None:
+        key, clarifications_key = self._keys(conv_id)
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping={
+                "query": data.get("query", ""),
+                "history": orjson.dumps(data.get("history", [])).decode()
+            })
+            pipe.delete(clarifications_key)
+            if data.get("clarifications"):
+                pipe.hset(clarifications_key, mapping=data["clarifications"])
+            pipe.expire(key, self.ttl_seconds)
+            pipe.expire(clarifications_key, self.ttl_seconds)
+            await pipe.execute()
+
+    async def update_clarifications(self, conv_id: str, clarifications: Dict[str, str]) -> None:
+        if not clarifications:
+            return
+        key, clarifications_key = self._keys(conv_id)
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.hset(clarifications_key, mapping=clarifications)
+            pipe.expire(key, self.ttl_seconds)
+            pipe.expire(clarifications_key, self.ttl_seconds)
+            await pipe.execute()
+
+    async def delete(self, conv_id: str) -> None:
+        await self.client.delete(*self._keys(conv_id))
@@ -1,16 +1,40 @@
 import os
-import uuid
+import secrets
+import functools
 from typing import List, Tuple
 from pathlib import Path
-import PyPDF2
+import fitz
 from docx import Document
 import pandas as pd
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 
 from models import DocumentType, DocumentMetadata, DocumentChunk
+from fast_split import FastTextSplitter
 from config import settings
 
 
+@functools.lru_cache(maxsize=8)
+def _get_text_splitter(chunk_size: int, chunk_overlap: int) -> RecursiveCharacterTextSplitter:
+    """Shared langchain splitter per chunking configuration"""
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=len,
+        separators=["\n\n", "\n", ". ", " ", ""],
+        is_separator_regex=False
+    )
+
+
+@functools.lru_cache(maxsize=8)
+def _get_fast_text_splitter(chunk_size: int, chunk_overlap: int) -> FastTextSplitter:
+    """Shared compiled splitter per chunking configuration"""
+    return FastTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        separators=["\n\n", "\n", ". ", " "]
+    )
+
+
 class DocumentProcessor:
     """Process and chunk documents for RAG"""
 
@@ -21,12 +45,18 @@ class DocumentProcessor:
     ):
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-            length_function=len,
-            separators=["\n\n", "\n", ". ", " ", ""]
-        )
+        self.text_splitter = _get_text_splitter(chunk_size, chunk_overlap)
+        # Compiled splitter for large documents; langchain handles the rest
+        self.fast_text_splitter = _get_fast_text_splitter(chunk_size, chunk_overlap)
+
+    @staticmethod
+    def get_document_type(filename: str) -> DocumentType:
+        """Determine a document's type from its file extension"""
+        file_ext = Path(filename).suffix.lower().replace('.', '')
+        try:
+            return DocumentType(file_ext)
+        except ValueError:
+            raise ValueError(f"Unsupported file type: {file_ext}")
 
     def process_document(
         self,
@@ -36,11 +66,7 @@ class DocumentProcessor:
         """Process a document and return metadata and chunks"""
 
         # Determine document type
-        file_ext = Path(filename).suffix.lower().replace('.', '')
-        try:
-            doc_type = DocumentType(file_ext)
-        except ValueError:
-            raise ValueError(f"Unsupported file type: {file_ext}")
+        doc_type = self.get_document_type(filename)
 
         # Extract text based on document type
         text = self._extract_text(file_path, doc_type)
@@ -49,7 +75,7 @@ class DocumentProcessor:
         file_size = os.path.getsize(file_path)
 
         # Generate document ID
-        document_id = str(uuid.uuid4())
+        document_id = secrets.token_hex(16)
 
         # Chunk the document
         chunks = self._chunk_text(text, document_id, filename)
@@ -83,13 +109,12 @@ class DocumentProcessor:
 
     def _extract_pdf(self, file_path: str) -> str:
         """Extract text from PDF"""
-        text = ""
-        with open(file_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            for page_num, page in enumerate(pdf_reader.pages):
-                page_text = page.extract_text()
-                text += f"\n\n--- Page {page_num + 1} ---\n\n{page_text}"
-        return text
+        parts = []
+        with fitz.open(file_path) as pdf:
+            for page_num, page in enumerate(pdf):
+                page_text = page.get_text("text")
+                parts.append(f"\n\n--- Page {page_num + 1} ---\n\n{page_text}")
+        return "".join(parts)
 
     def _extract_docx(self, file_path: str) -> str:
         """Extract text from DOCX"""
@@ -108,21 +133,24 @@ class DocumentProcessor:
         # Convert dataframe to readable text format
         text = f"CSV Data with {len(df)} rows and {len(df.columns)} columns\n\n"
         text += f"Columns: {', '.join(df.columns)}\n\n"
-        text += df.to_string(index=False)
+        text += self._format_table(df)
         return text
 
     def _extract_xlsx(self, file_path: str) -> str:
         """Extract text from XLSX"""
-        xl_file = pd.ExcelFile(file_path)
-        text = ""
+        # Read every sheet in one pass over the workbook
+        sheets = pd.read_excel(file_path, sheet_name=None, engine="openpyxl")
 
-        for sheet_name in xl_file.sheet_names:
-            df = pd.read_excel(xl_file, sheet_name=sheet_name)
-            text += f"\n\n--- Sheet: {sheet_name} ---\n\n"
-            text += f"Columns: {', '.join(df.columns)}\n\n"
-            text += df.to_string(index=False)
+        return "".join([
+            f"\n\n--- Sheet: {sheet_name} ---\n\n"
+            f"Columns: {', '.join(df.columns)}\n\n"
+            f"{self._format_table(df)}"
+            for sheet_name, df in sheets.items()
+        ])
 
-        return text
+    def _format_table(self, df: pd.DataFrame) -> str:
+        """Serialize a dataframe as tab-separated text using pandas' C writer"""
+        return df.to_csv(sep='\t', index=False, lineterminator='\n')
 
     def _chunk_text(
         self,
@@ -132,8 +160,11 @@ class DocumentProcessor:
     ) -> List[DocumentChunk]:
         """Split text into chunks"""
 
-        # Split text using langchain's text splitter
-        text_chunks = self.text_splitter.split_text(text)
+        # Split text, using the compiled splitter for large documents
+        if len(text) > settings.fast_split_min_chars:
+            text_chunks = self.fast_text_splitter.split_text(text)
+        else:
+            text_chunks = self.text_splitter.split_text(text)
 
         # Create DocumentChunk objects
         chunks = []
@@ -0,0 +1,97 @@
+import asyncio
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+
+class EmbeddingBatcher:
+    """
+    Coalesces embedding requests from concurrent callers into shared batches
+
+    Requests are queued and a background task drains them into batches bounded
+    by an approximate token budget, waiting briefly for more requests to
+    arrive, then runs one encode call per batch in a worker thread and hands
+    each caller its slice of the result.
+    """
+
+    def __init__(
+        self,
+        encode_fn: Callable[[List[str]], np.ndarray],
+        max_batch_tokens: int = 8192,
+        linger_seconds: float = 0.01
+    ):
+        self.encode_fn = encode_fn
+        self.max_batch_tokens = max_batch_tokens
+        self.linger_seconds = linger_seconds
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        """Embed texts, sharing the model call with other in-flight requests"""
+
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((texts, future))
+        return await future
+
+    async def close(self) -> None:
+        """Stop the background worker"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+            self._queue = None
+
+    def _ensure_worker(self) -> None:
+        """Start the background worker on the running event loop"""
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+    @staticmethod
+    def _estimate_tokens(texts: List[str]) -> int:
+        """Rough token count (~4 characters per token)"""
+        return sum(len(text) for text in texts) // 4 + len(texts)
+
+    async def _run(self) -> None:
+        """Drain queued requests into batches and encode them"""
+
+        loop = asyncio.get_running_loop()
+
+        while True:
+            items: List[Tuple[List[str], asyncio.Future]] = [await self._queue.get()]
+            budget = self.max_batch_tokens - self._estimate_tokens(items[0][0])
+
+            # Linger briefly so concurrent requests can join the batch
+            deadline = loop.time() + self.linger_seconds
+            while budget > 0:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                items.append(item)
+                budget -= self._estimate_tokens(item[0])
+
+            all_texts = [text for texts, _ in items for text in texts]
+            try:
+                embeddings = await loop.run_in_executor(None, self.encode_fn, all_texts)
+            except Exception as e:
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            start = 0
+            for texts, future in items:
+                if not future.done():
+                    future.set_result(embeddings[start:start + len(texts)])
+                start += len(texts)
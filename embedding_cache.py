@@ -0,0 +1,59 @@
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+
+class EmbeddingCache:
+    """
+    Persistent content-hash -> embedding cache backed by SQLite
+
+    Keys are SHA-256 digests of chunk text. Vectors are stored as float16
+    by default to halve disk footprint and are returned as float32.
+    """
+
+    def __init__(self, path: str, dtype=np.float16):
+        self.dtype = np.dtype(dtype)
+        # One table per storage dtype so entries of different widths never mix
+        self._table = f"embeddings_{self.dtype.name}"
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self._table} (hash BLOB PRIMARY KEY, vector BLOB NOT NULL)"
+            )
+
+    def get_many(self, keys: Iterable[bytes]) -> Dict[bytes, np.ndarray]:
+        """Fetch cached embeddings for the given keys, skipping misses"""
+
+        keys = list(dict.fromkeys(keys))
+        found: Dict[bytes, np.ndarray] = {}
+
+        # Stay below SQLite's default bound-parameter limit
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT hash, vector FROM {self._table} WHERE hash IN ({placeholders})",
+                    batch
+                ).fetchall()
+                for key, vector in rows:
+                    found[key] = np.frombuffer(vector, dtype=self.dtype).astype(np.float32)
+
+        return found
+
+    def put_many(self, items: List[Tuple[bytes, np.ndarray]]) -> None:
+        """Store embeddings, replacing any existing entries"""
+
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO {self._table} (hash, vector) VALUES (?, ?)",
+                [(key, np.asarray(vector, dtype=self.dtype).tobytes()) for key, vector in items]
+            )
+
+    def close(self) -> None:
+        """Close the underlying database connection"""
+        with self._lock:
+            self._conn.close()
@@ -4,27 +4,54 @@ Example usage of ClaRA RAG System
 This script demonstrates how to use the ClaRA RAG system programmatically
 """
 
-import requests
-import json
+import asyncio
 from pathlib import Path
 
+import httpx
 
-class ClaRAClient:
-    """Simple client for ClaRA RAG API"""
 
-    def __init__(self, base_url="http://localhost:8000"):
-        self.base_url = base_url
+class AsyncClaRAClient:
+    """Simple async client for ClaRA RAG API"""
+
+    def __init__(self, base_url="http://localhost:8000", max_concurrent_uploads=8):
+        self.client = httpx.AsyncClient(base_url=base_url, timeout=120.0)
         self.conversation_id = None
+        # Bound concurrent uploads to avoid overrunning the server
+        self._upload_semaphore = asyncio.Semaphore(max_concurrent_uploads)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        """Close the underlying HTTP client"""
+        await self.client.aclose()
 
-    def upload_document(self, file_path):
-        """Upload a document"""
-        with open(file_path, "rb") as f:
-            files = {"file": (Path(file_path).name, f)}
-            response = requests.post(f"{self.base_url}/upload", files=files)
+    async def upload_document(self, file_path, poll_interval=0.5):
+        """Upload a document and wait for it to be processed"""
+        async with self._upload_semaphore:
+            with open(file_path, "rb") as f:
+                files = {"file": (Path(file_path).name, f.read())}
+            response = await self.client.post("/upload", files=files)
             response.raise_for_status()
-            return response.json()
+            job_id = response.json()["job_id"]
+
+        # Processing happens in the background; poll until the job finishes
+        while True:
+            response = await self.client.get(f"/jobs/{job_id}")
+            response.raise_for_status()
+            job = response.json()
+            if job["status"] not in ("queued", "processing"):
+                return job
+            await asyncio.sleep(poll_interval)
+
+    async def upload_documents(self, file_paths):
+        """Upload several documents concurrently"""
+        return await asyncio.gather(*[self.upload_document(path) for path in file_paths])
 
-    def query(self, question, clarifications=None):
+    async def query(self, question, clarifications=None):
         """Ask a question"""
         data = {
             "query": question,
@@ -32,11 +59,7 @@ class ClaRAClient:
             "clarifications": clarifications
         }
 
-        response = requests.post(
-            f"{self.base_url}/query",
-            headers={"Content-Type": "application/json"},
-            data=json.dumps(data)
-        )
+        response = await self.client.post("/query", json=data)
         response.raise_for_status()
         result = response.json()
 
@@ -46,189 +69,189 @@ class ClaRAClient:
 
         return result
 
-    def list_documents(self):
+    async def list_documents(self):
         """List all uploaded documents"""
-        response = requests.get(f"{self.base_url}/documents")
+        response = await self.client.get("/documents")
         response.raise_for_status()
         return response.json()
 
-    def clear_documents(self):
+    async def clear_documents(self):
         """Clear all documents"""
-        response = requests.delete(f"{self.base_url}/documents")
+        response = await self.client.delete("/documents")
         response.raise_for_status()
         return response.json()
 
 
-def example_basic_usage():
+async def example_basic_usage():
     """Example: Basic document upload and query"""
     print("\n" + "="*60)
     print("Example 1: Basic Usage")
     print("="*60)
 
-    client = ClaRAClient()
-
-    # Create a sample document
-    sample_doc = "sample_doc.txt"
-    with open(sample_doc, "w") as f:
-        f.write("""
-        Product Manual - SmartWidget Pro
-
-        Overview:
-        SmartWidget Pro is an advanced widget with AI capabilities.
-        Price: $299
-        Weight: 1.2 kg
-        Battery life: 48 hours
-
-        Features:
-        - Voice control
-        - Wireless charging
-        - Water resistant (IP67)
-        - 5-year warranty
-
-        Setup Instructions:
-        1. Charge for 4 hours before first use
-        2. Download the SmartWidget app
-        3. Pair via Bluetooth
-        4. Follow in-app setup wizard
-        """)
-
-    # Upload document
-    print("\n📤 Uploading document...")
-    result = client.upload_document(sample_doc)
-    print(f"✅ {result['message']}")
-
-    # Ask a question
-    print("\n💬 Asking: 'How much does it cost?'")
-    response = client.query("How much does it cost?")
-
-    if "answer" in response:
-        print(f"\n🤖 Answer: {response['answer']}")
-        print(f"📊 Confidence: {response['confidence_score']:.0%}")
-    else:
-        print("❓ ClaRA needs clarification")
-
-    # Cleanup
-    Path(sample_doc).unlink()
-
-
-def example_clarification_workflow():
-    """Example: Handling clarifications"""
-    print("\n" + "="*60)
-    print("Example 2: ClaRA Clarification Workflow")
-    print("="*60)
-
-    client = ClaRAClient()
-
-    # Create document with ambiguous content
-    sample_doc = "company_report.txt"
-    with open(sample_doc, "w") as f:
-        f.write("""
-        Q3 Company Report
-
-        Technical Performance:
-        - API response time: 150ms
-        - System uptime: 99.9%
-        - Bug fix rate improved by 40%
-
-        Financial Performance:
-        - Revenue: $5.2M
-        - Profit margin: 22%
-        - Growth rate: 35% YoY
-
-        Team Performance:
-        - Employee satisfaction: 4.2/5
-        - Retention rate: 92%
-        - New hires: 15 engineers
-        """)
-
-    # Upload
-    print("\n📤 Uploading company report...")
-    result = client.upload_document(sample_doc)
-    print(f"✅ {result['message']}")
-
-    # Ask ambiguous question
-    print("\n💬 Asking: 'What was the performance like?'")
-    response = client.query("What was the performance like?")
-
-    if response.get("needs_clarification"):
-        print("\n❓ ClaRA needs clarification:")
-
-        # Display clarifying questions
-        for i, question in enumerate(response["questions"], 1):
-            print(f"\nQuestion {i}: {question['question_text']}")
-            if question.get("suggested_options"):
-                for j, option in enumerate(question["suggested_options"], 1):
-                    print(f"  {j}. {option}")
-
-        # Answer the clarification
-        print("\n💬 Answering: 'Financial Performance'")
-
-        clarifications = {
-            response["questions"][0]["question_id"]: "Financial Performance"
-        }
-
-        response = client.query(
-            "What was the performance like?",
-            clarifications=clarifications
-        )
+    async with AsyncClaRAClient() as client:
+        # Create a sample document
+        sample_doc = "sample_doc.txt"
+        with open(sample_doc, "w") as f:
+            f.write("""
+            Product Manual - SmartWidget Pro
+
+            Overview:
+            SmartWidget Pro is an advanced widget with AI capabilities.
+            Price: $299
+            Weight: 1.2 kg
+            Battery life: 48 hours
+
+            Features:
+            - Voice control
+            - Wireless charging
+            - Water resistant (IP67)
+            - 5-year warranty
+
+            Setup Instructions:
+            1. Charge for 4 hours before first use
+            2. Download the SmartWidget app
+            3. Pair via Bluetooth
+            4. Follow in-app setup wizard
+            """)
+
+        # Upload document
+        print("\n📤 Uploading document...")
+        result = await client.upload_document(sample_doc)
+        print(f"✅ {result['message']}")
+
+        # Ask a question
+        print("\n💬 Asking: 'How much does it cost?'")
+        response = await client.query("How much does it cost?")
 
         if "answer" in response:
-            print(f"\n🤖 Refined Answer: {response['answer']}")
+            print(f"\n🤖 Answer: {response['answer']}")
             print(f"📊 Confidence: {response['confidence_score']:.0%}")
-            print(f"✅ Used clarifications: {response['used_clarifications']}")
+        else:
+            print("❓ ClaRA needs clarification")
 
-    # Cleanup
-    Path(sample_doc).unlink()
+        # Cleanup
+        Path(sample_doc).unlink()
 
 
-def example_multiple_documents():
-    """Example: Working with multiple documents"""
+async def example_clarification_workflow():
+    """Example: Handling clarifications"""
     print("\n" + "="*60)
-    print("Example 3: Multiple Documents")
+    print("Example 2: ClaRA Clarification Workflow")
     print("="*60)
 
-    client = ClaRAClient()
-
-    # Clear existing documents
-    print("\n🧹 Clearing existing documents...")
-    client.clear_documents()
+    async with AsyncClaRAClient() as client:
+        # Create document with ambiguous content
+        sample_doc = "company_report.txt"
+        with open(sample_doc, "w") as f:
+            f.write("""
+            Q3 Company Report
+
+            Technical Performance:
+            - API response time: 150ms
+            - System uptime: 99.9%
+            - Bug fix rate improved by 40%
+
+            Financial Performance:
+            - Revenue: $5.2M
+            - Profit margin: 22%
+            - Growth rate: 35% YoY
+
+            Team Performance:
+            - Employee satisfaction: 4.2/5
+            - Retention rate: 92%
+            - New hires: 15 engineers
+            """)
+
+        # Upload
+        print("\n📤 Uploading company report...")
+        result = await client.upload_document(sample_doc)
+        print(f"✅ {result['message']}")
+
+        # Ask ambiguous question
+        print("\n💬 Asking: 'What was the performance like?'")
+        response = await client.query("What was the performance like?")
+
+        if response.get("needs_clarification"):
+            print("\n❓ ClaRA needs clarification:")
+
+            # Display clarifying questions
+            for i, question in enumerate(response["questions"], 1):
+                print(f"\nQuestion {i}: {question['question_text']}")
+                if question.get("suggested_options"):
+                    for j, option in enumerate(question["suggested_options"], 1):
+                        print(f"  {j}. {option}")
+
+            # Answer the clarification
+            print("\n💬 Answering: 'Financial Performance'")
+
+            clarifications = {
+                response["questions"][0]["question_id"]: "Financial Performance"
+            }
+
+            response = await client.query(
+                "What was the performance like?",
+                clarifications=clarifications
+            )
+
+            if "answer" in response:
+                print(f"\n🤖 Refined Answer: {response['answer']}")
+                print(f"📊 Confidence: {response['confidence_score']:.0%}")
+                print(f"✅ Used clarifications: {response['used_clarifications']}")
 
-    # Create multiple documents
-    docs = {
-        "policy.txt": "Company Policy: All employees must submit timesheets by Friday. Remote work is allowed 3 days per week.",
-        "benefits.txt": "Benefits Package: Health insurance, 401k matching up to 6%, 20 days PTO, gym membership.",
-        "handbook.txt": "Employee Handbook: Dress code is business casual. Office hours are 9 AM - 6 PM."
-    }
+        # Cleanup
+        Path(sample_doc).unlink()
 
-    # Upload all documents
-    print("\n📤 Uploading multiple documents...")
-    for filename, content in docs.items():
-        with open(filename, "w") as f:
-            f.write(content)
 
-        result = client.upload_document(filename)
-        print(f"✅ Uploaded: {filename}")
+async def example_multiple_documents():
+    """Example: Working with multiple documents"""
+    print("\n" + "="*60)
+    print("Example 3: Multiple Documents")
+    print("="*60)
 
-        # Cleanup
-        Path(filename).unlink()
+    async with AsyncClaRAClient() as client:
+        # Clear existing documents
+        print("\n🧹 Clearing existing documents...")
+        await client.clear_documents()
 
-    # List documents
-    print("\n📋 Current documents:")
-    doc_list = client.list_documents()
-    print(f"Total: {doc_list['total_documents']} documents, {doc_list['total_chunks']} chunks")
+        # Create multiple documents
+        docs = {
+            "policy.txt": "Company Policy: All employees must submit timesheets by Friday. Remote work is allowed 3 days per week.",
+            "benefits.txt": "Benefits Package: Health insurance, 401k matching up to 6%, 20 days PTO, gym membership.",
+            "handbook.txt": "Employee Handbook: Dress code is business casual. Office hours are 9 AM - 6 PM."
+        }
 
-    # Query across all documents
-    print("\n💬 Asking: 'What are the benefits?'")
-    response = client.query("What are the benefits?")
+        # Upload all documents concurrently
+        print("\n📤 Uploading multiple documents...")
+        for filename, content in docs.items():
+            with open(filename, "w") as f:
+                f.write(content)
+
+        try:
+            await client.upload_documents(list(docs))
+            for filename in docs:
+                print(f"✅ Uploaded: {filename}")
+        finally:
+            # Cleanup
+            for filename in docs:
+                Path(filename).unlink()
+
+        # List documents
+        print("\n📋 Current documents:")
+        doc_list = await client.list_documents()
+        print(f"Total: {doc_list['total_documents']} documents, {doc_list['total_chunks']} chunks")
+
+        # Query across all documents
+        print("\n💬 Asking: 'What are the benefits?'")
+        response = await client.query("What are the benefits?")
 
-    if "answer" in response:
-        print(f"\n🤖 Answer: {response['answer']}")
+        if "answer" in response:
+            print(f"\n🤖 Answer: {response['answer']}")
 
-        if response.get("sources"):
-            print(f"\n📚 Sources ({len(response['sources'])}):")
-            for i, source in enumerate(response['sources'][:3], 1):
-                print(f"  {i}. {source['chunk']['metadata']['source_file']}")
-                print(f"     Relevance: {source['relevance_score']:.0%}")
+            if response.get("sources"):
+                print(f"\n📚 Sources ({len(response['sources'])}):")
+                for i, source in enumerate(response['sources'][:3], 1):
+                    print(f"  {i}. {source['chunk']['metadata']['source_file']}")
+                    print(f"     Relevance: {source['relevance_score']:.0%}")
 
 
 def main():
@@ -241,19 +264,19 @@ def main():
     try:
         input("\nPress Enter to continue...")
 
-        example_basic_usage()
+        asyncio.run(example_basic_usage())
         input("\nPress Enter for next example...")
 
-        example_clarification_workflow()
+        asyncio.run(example_clarification_workflow())
         input("\nPress Enter for next example...")
 
-        example_multiple_documents()
+        asyncio.run(example_multiple_documents())
 
         print("\n" + "="*60)
         print("✅ All examples completed!")
         print("="*60)
 
-    except requests.exceptions.ConnectionError:
+    except httpx.ConnectError:
         print("\n❌ Cannot connect to server. Is it running?")
         print("   Start it with: python main.py")
     except KeyboardInterrupt:
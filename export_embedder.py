@@ -0,0 +1,49 @@
+"""
+Export the embedding model to ONNX and quantize it to INT8
+
+Run once before setting ONNX_EMBEDDING_DIR:
+
+    python export_embedder.py --output ./onnx_embedder
+"""
+
+import argparse
+import os
+
+from optimum.onnxruntime import ORTModelForFeatureExtraction
+from onnxruntime.quantization import QuantType, quantize_dynamic
+from transformers import AutoTokenizer
+
+from config import settings
+
+
+def export_embedder(model_name: str, output_dir: str) -> str:
+    """Export model_name to ONNX in output_dir and return the INT8 model path"""
+
+    model = ORTModelForFeatureExtraction.from_pretrained(model_name, export=True)
+    model.save_pretrained(output_dir)
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(output_dir)
+
+    quantized_path = os.path.join(output_dir, "model.int8.onnx")
+    quantize_dynamic(
+        os.path.join(output_dir, "model.onnx"),
+        quantized_path,
+        weight_type=QuantType.QInt8,
+        per_channel=True
+    )
+
+    return quantized_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the embedding model to INT8 ONNX")
+    parser.add_argument("--model", default=settings.embedding_model, help="Sentence-transformers model name")
+    parser.add_argument("--output", default=settings.onnx_embedding_dir or "./onnx_embedder", help="Output directory")
+    args = parser.parse_args()
+
+    quantized_path = export_embedder(args.model, args.output)
+    print(f"✅ Quantized model written to {quantized_path}")
+    print(f"   Set ONNX_EMBEDDING_DIR={args.output} to use it")
+
+
+if __name__ == "__main__":
+    main()
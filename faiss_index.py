@@ -0,0 +1,244 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, List, Tuple
+
+import faiss
+import numpy as np
+import orjson
+
+
+def chunk_int_id(chunk_id: str) -> int:
+    """Stable non-negative int64 id for a chunk id"""
+    digest = hashlib.blake2b(chunk_id.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") >> 1
+
+
+class FaissChunkIndex:
+    """
+    In-process FAISS HNSW index over chunk embeddings
+
+    Vectors live in an IndexIDMap2-wrapped IndexHNSWFlat (inner product over
+    normalized embeddings, i.e. cosine similarity); chunk content and metadata
+    live in a small SQLite table keyed by the same int64 ids. HNSW cannot
+    remove vectors, so deleted chunks are dropped from the table and filtered
+    out of results; the index is rebuilt once too many stale vectors pile up.
+
+    The SQLite table is durable on every write, but the index file is only
+    written by save(), so after a crash it may lag the table; has_all_vectors()
+    tells the caller to rebuild it.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        dim: int,
+        hnsw_m: int = 32,
+        max_stale_fraction: float = 0.2
+    ):
+        self.dim = dim
+        self.hnsw_m = hnsw_m
+        self.max_stale_fraction = max_stale_fraction
+        self.index_path = os.path.join(directory, "faiss_hnsw.index")
+
+        self._lock = threading.RLock()
+        # Serializes save() so an older snapshot never overwrites a newer one
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self._conn = sqlite3.connect(os.path.join(directory, "faiss_chunks.sqlite3"), check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS chunks ("
+                "int_id INTEGER PRIMARY KEY, chunk_id TEXT NOT NULL, document_id TEXT NOT NULL, "
+                "content TEXT NOT NULL, metadata TEXT NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS chunks_document_id ON chunks (document_id)")
+
+        if os.path.exists(self.index_path):
+            self.index = faiss.read_index(self.index_path)
+        else:
+            self.index = self._new_index()
+
+        # Live chunk count, kept in memory so searches skip a COUNT(*) scan
+        self._live = self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+        # Bumped on every change, so a rebuild built outside the lock can tell it is stale
+        self._version = 0
+
+    def __len__(self) -> int:
+        return self._live
+
+    def add(
+        self,
+        chunk_ids: List[str],
+        embeddings: np.ndarray,
+        documents: List[str],
+        metadatas: List[Dict[str, Any]]
+    ) -> None:
+        """Add chunk embeddings and their payloads"""
+
+        int_ids = np.array([chunk_int_id(chunk_id) for chunk_id in chunk_ids], dtype=np.int64)
+
+        with self._lock:
+            # Re-added chunks replace their rows without changing the count
+            existing = self._count_existing(np.unique(int_ids).tolist())
+            self.index.add_with_ids(np.ascontiguousarray(embeddings, dtype=np.float32), int_ids)
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO chunks (int_id, chunk_id, document_id, content, metadata) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (int(int_id), chunk_id, metadata["document_id"], document, orjson.dumps(metadata).decode())
+                        for int_id, chunk_id, document, metadata in zip(int_ids, chunk_ids, documents, metadatas)
+                    ]
+                )
+            self._live += len(np.unique(int_ids)) - existing
+            self._version += 1
+            self._dirty = True
+
+    def search(
+        self,
+        query_embedding: np.ndarray,
+        k: int
+    ) -> Tuple[List[str], List[str], List[Dict[str, Any]], List[float]]:
+        """
+        Find the k nearest chunks
+
+        Returns (ids, documents, metadatas, distances) in ChromaDB's cosine
+        distance convention (1 - similarity), nearest first.
+        """
+
+        with self._lock:
+            live = self._live
+            if live == 0:
+                return [], [], [], []
+
+            # Over-fetch to make up for deleted vectors still in the index
+            stale = self.index.ntotal - live
+            similarities, int_ids = self.index.search(
+                np.ascontiguousarray(query_embedding, dtype=np.float32).reshape(1, -1),
+                min(k + stale, self.index.ntotal)
+            )
+
+            hits = [(int(i), float(s)) for i, s in zip(int_ids[0], similarities[0]) if i >= 0]
+            rows = self._fetch_rows([int_id for int_id, _ in hits])
+
+        ids, documents, metadatas, distances = [], [], [], []
+        seen = set()
+        for int_id, similarity in hits:
+            if int_id not in rows or int_id in seen:
+                continue
+            seen.add(int_id)
+            chunk_id, content, metadata = rows[int_id]
+            ids.append(chunk_id)
+            documents.append(content)
+            metadatas.append(metadata)
+            distances.append(1.0 - similarity)
+            if len(ids) == k:
+                break
+
+        return ids, documents, metadatas, distances
+
+    def delete_document(self, document_id: str) -> None:
+        """Delete all chunks of a document (blocking; may rebuild the index)"""
+        with self._lock:
+            with self._conn:
+                deleted = self._conn.execute("DELETE FROM chunks WHERE document_id = ?", (document_id,)).rowcount
+            self._live -= deleted
+            self._version += 1
+        self._maybe_rebuild()
+
+    def clear(self) -> None:
+        """Remove every chunk"""
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM chunks")
+            self.index = self._new_index()
+            self._live = 0
+            self._version += 1
+            self._dirty = True
+
+    def has_all_vectors(self) -> bool:
+        """Whether every chunk in the table has a vector in the index"""
+        with self._lock:
+            live_ids = np.array(
+                [row[0] for row in self._conn.execute("SELECT int_id FROM chunks").fetchall()],
+                dtype=np.int64
+            )
+            indexed_ids = faiss.vector_to_array(self.index.id_map)
+        return bool(np.isin(live_ids, indexed_ids).all())
+
+    def save(self) -> None:
+        """Persist the index if it changed since the last save"""
+
+        with self._save_lock:
+            # Snapshot under the lock; the slow file write happens outside it
+            with self._lock:
+                if not self._dirty:
+                    return
+                data = faiss.serialize_index(self.index)
+                self._dirty = False
+
+            tmp_path = f"{self.index_path}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data.tobytes())
+            os.replace(tmp_path, self.index_path)
+
+    def _count_existing(self, int_ids: List[int]) -> int:
+        """Number of the given ids already in the table"""
+        existing = 0
+        # Stay below SQLite's bound-parameter limit
+        for start in range(0, len(int_ids), 500):
+            batch = int_ids[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            existing += self._conn.execute(
+                f"SELECT COUNT(*) FROM chunks WHERE int_id IN ({placeholders})",
+                batch
+            ).fetchone()[0]
+        return existing
+
+    def _fetch_rows(self, int_ids: List[int]) -> Dict[int, Tuple[str, str, Dict[str, Any]]]:
+        """Look up chunk payloads by int id"""
+
+        if not int_ids:
+            return {}
+
+        placeholders = ",".join("?" * len(int_ids))
+        rows = self._conn.execute(
+            f"SELECT int_id, chunk_id, content, metadata FROM chunks WHERE int_id IN ({placeholders})",
+            int_ids
+        ).fetchall()
+        return {
+            int_id: (chunk_id, content, orjson.loads(metadata))
+            for int_id, chunk_id, content, metadata in rows
+        }
+
+    def _maybe_rebuild(self) -> None:
+        """Rebuild the index from live vectors once stale vectors dominate"""
+
+        with self._lock:
+            stale = self.index.ntotal - self._live
+            if stale <= self.max_stale_fraction * max(self.index.ntotal, 1):
+                return
+
+            live_ids = np.array(
+                [row[0] for row in self._conn.execute("SELECT int_id FROM chunks").fetchall()],
+                dtype=np.int64
+            )
+            vectors = self.index.reconstruct_batch(live_ids) if len(live_ids) else None
+            version = self._version
+
+        # Build the new graph without blocking searches; HNSW insertion is the slow part
+        index = self._new_index()
+        if vectors is not None:
+            index.add_with_ids(vectors, live_ids)
+
+        with self._lock:
+            # Chunks changed meanwhile; the next delete retries the rebuild
+            if self._version != version:
+                return
+            self.index = index
+            self._dirty = True
+
+    def _new_index(self):
+        return faiss.IndexIDMap2(faiss.IndexHNSWFlat(self.dim, self.hnsw_m, faiss.METRIC_INNER_PRODUCT))
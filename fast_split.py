@@ -0,0 +1,124 @@
+from typing import List
+
+import numpy as np
+from numba import njit
+
+
+DEFAULT_SEPARATORS = ["\n\n", "\n", ". ", " "]
+
+
+@njit(cache=True)
+def _rfind(buf, lo, hi, sep, sep_len):
+    """Last position p in [lo, hi - sep_len] where sep starts, or -1"""
+    p = hi - sep_len
+    while p >= lo:
+        matched = True
+        for j in range(sep_len):
+            if buf[p + j] != sep[j]:
+                matched = False
+                break
+        if matched:
+            return p
+        p -= 1
+    return -1
+
+
+@njit(cache=True)
+def split_offsets(buf, seps, sep_lens, chunk_size, overlap):
+    """
+    Find (start, end) byte offsets of chunks in a UTF-8 buffer
+
+    Each chunk is at most chunk_size bytes and ends after the highest-priority
+    separator found in its window; consecutive chunks overlap by up to
+    overlap bytes, starting on a whitespace boundary. Chunks always start and
+    end on code point boundaries.
+    """
+    n = buf.shape[0]
+    out = np.empty((16, 2), dtype=np.int64)
+    count = 0
+    start = 0
+
+    while start < n:
+        end = start + chunk_size
+        if end >= n:
+            cut = n
+        else:
+            # Cut after the best separator, leaving room for the overlap
+            cut = -1
+            for s in range(seps.shape[0]):
+                p = _rfind(buf, start + overlap + 1, end, seps[s], sep_lens[s])
+                if p >= 0:
+                    cut = p + sep_lens[s]
+                    break
+            if cut < 0:
+                # Hard cut, backing off UTF-8 continuation bytes
+                cut = end
+                while cut > start + 1 and (buf[cut] & 0xC0) == 0x80:
+                    cut -= 1
+
+        if count == out.shape[0]:
+            grown = np.empty((out.shape[0] * 2, 2), dtype=np.int64)
+            grown[:count] = out[:count]
+            out = grown
+        out[count, 0] = start
+        out[count, 1] = cut
+        count += 1
+
+        if cut >= n:
+            break
+
+        # Start the next chunk inside the overlap, on a whitespace boundary
+        next_start = max(cut - overlap, start + 1)
+        for p in range(next_start, cut):
+            if buf[p] == 32 or buf[p] == 10:
+                next_start = p + 1
+                break
+        # Without whitespace in the overlap, skip forward past UTF-8 continuation bytes
+        while next_start < cut and (buf[next_start] & 0xC0) == 0x80:
+            next_start += 1
+        start = next_start
+
+    return out[:count]
+
+
+class FastTextSplitter:
+    """
+    Text splitter running the separator scan as compiled code over UTF-8 bytes
+
+    chunk_size and chunk_overlap are measured in UTF-8 bytes, not characters:
+    they match the character-based splitter for ASCII text, while text with
+    multi-byte characters yields chunks with fewer characters.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 1000,
+        chunk_overlap: int = 200,
+        separators: List[str] = DEFAULT_SEPARATORS
+    ):
+        if chunk_overlap >= chunk_size:
+            raise ValueError("chunk_overlap must be smaller than chunk_size")
+
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+
+        encoded = [sep.encode("utf-8") for sep in separators if sep]
+        self._sep_lens = np.array([len(sep) for sep in encoded], dtype=np.int64)
+        self._seps = np.zeros((len(encoded), max(self._sep_lens, default=1)), dtype=np.uint8)
+        for i, sep in enumerate(encoded):
+            self._seps[i, :len(sep)] = np.frombuffer(sep, dtype=np.uint8)
+
+    def split_text(self, text: str) -> List[str]:
+        """Split text into chunks of at most chunk_size UTF-8 bytes"""
+
+        data = text.encode("utf-8")
+        offsets = split_offsets(
+            np.frombuffer(data, dtype=np.uint8),
+            self._seps,
+            self._sep_lens,
+            self.chunk_size,
+            self.chunk_overlap
+        )
+
+        chunks = [data[start:end].decode("utf-8").strip() for start, end in offsets]
+        return [chunk for chunk in chunks if chunk]
@@ -0,0 +1,76 @@
+import sqlite3
+import threading
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+
+class Int8CodeStore:
+    """
+    Int8-quantized chunk embeddings for re-ranking, backed by SQLite
+
+    Codes live beside the indexes rather than in chunk metadata, so listing
+    documents or fetching search results never carries them along.
+    """
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS codes ("
+                "chunk_id TEXT PRIMARY KEY, document_id TEXT NOT NULL, scale REAL NOT NULL, codes BLOB NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS codes_document_id ON codes (document_id)")
+
+    def put_many(
+        self,
+        chunk_ids: List[str],
+        document_ids: List[str],
+        codes: np.ndarray,
+        scales: np.ndarray
+    ) -> None:
+        """Store codes and scales, replacing any existing entries"""
+
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO codes (chunk_id, document_id, scale, codes) VALUES (?, ?, ?, ?)",
+                [
+                    (chunk_id, document_id, float(scale), code.tobytes())
+                    for chunk_id, document_id, code, scale in zip(chunk_ids, document_ids, codes, scales)
+                ]
+            )
+
+    def get_many(self, chunk_ids: List[str]) -> Dict[str, Tuple[bytes, float]]:
+        """Fetch (codes, scale) for the given chunks, skipping misses"""
+
+        found: Dict[str, Tuple[bytes, float]] = {}
+
+        # Stay below SQLite's default bound-parameter limit
+        with self._lock:
+            for start in range(0, len(chunk_ids), 500):
+                batch = chunk_ids[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT chunk_id, codes, scale FROM codes WHERE chunk_id IN ({placeholders})",
+                    batch
+                ).fetchall()
+                for chunk_id, code, scale in rows:
+                    found[chunk_id] = (code, scale)
+
+        return found
+
+    def delete_document(self, document_id: str) -> None:
+        """Delete the codes of a document's chunks"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM codes WHERE document_id = ?", (document_id,))
+
+    def clear(self) -> None:
+        """Remove every code"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM codes")
+
+    def close(self) -> None:
+        """Close the underlying database connection"""
+        with self._lock:
+            self._conn.close()
@@ -1,10 +1,16 @@
+import asyncio
 import os
-import shutil
+import secrets
+from contextlib import asynccontextmanager
 from pathlib import Path
 from typing import List, Optional
 
+import aiofiles
+import orjson
+from cachetools import TTLCache
+
 from fastapi import FastAPI, File, UploadFile, HTTPException, BackgroundTasks
-from fastapi.responses import HTMLResponse, FileResponse
+from fastapi.responses import HTMLResponse, FileResponse, StreamingResponse, ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
@@ -13,6 +19,8 @@ from config import settings
 from models import (
     QueryRequest,
     UploadResponse,
+    JobStatus,
+    JobResponse,
     HealthResponse,
     ClarificationResponse,
     AnswerResponse
@@ -20,13 +28,49 @@ from models import (
 from document_processor import DocumentProcessor
 from vector_store import VectorStore
 from clara_engine import ClaRAEngine
+from conversation_store import RedisConversationStore
+
+
+# Components are created per worker process in lifespan
+document_processor = DocumentProcessor()
+vector_store: Optional[VectorStore] = None
+clara_engine: Optional[ClaRAEngine] = None
+# Ingestion job status by job_id, kept for a day
+jobs: TTLCache = TTLCache(maxsize=10_000, ttl=24 * 3600)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Initialize components and warm up the embedding model before serving; stop background work on shutdown"""
+    global vector_store, clara_engine
+
+    vector_store = await asyncio.to_thread(VectorStore)
+    conversation_store = (
+        RedisConversationStore(settings.redis_url, settings.conversation_ttl_seconds)
+        if settings.redis_url else None
+    )
+    clara_engine = ClaRAEngine(vector_store, conversation_store=conversation_store)
+
+    await asyncio.to_thread(vector_store.warmup)
+    flusher = asyncio.create_task(vector_store.run_periodic_flush())
+    saver = asyncio.create_task(vector_store.run_periodic_save())
+    yield
+    flusher.cancel()
+    saver.cancel()
+    # Write any chunks still buffered so no uploads are lost, then persist the FAISS index
+    await vector_store.flush(force=True)
+    await asyncio.to_thread(vector_store.save)
+    await vector_store.embedding_batcher.close()
+    await vector_store.query_batcher.close()
 
 
 # Initialize FastAPI app
 app = FastAPI(
     title=settings.app_name,
     description="RAG system with Apple's ClaRA approach for clarifying questions",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -38,12 +82,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize components
-document_processor = DocumentProcessor()
-vector_store = VectorStore()
-clara_engine = ClaRAEngine(vector_store)
-
-
 # ============ API Endpoints ============
 
 @app.get("/", response_class=HTMLResponse)
@@ -61,43 +99,85 @@ async def health_check():
     return HealthResponse(status="healthy")
 
 
-@app.post("/upload", response_model=UploadResponse)
+@app.post("/upload", response_model=UploadResponse, status_code=202)
 async def upload_document(
     file: UploadFile = File(...),
     background_tasks: BackgroundTasks = None
 ):
     """
-    Upload and process a document
+    Upload a document and queue it for processing
 
     Supported formats: PDF, DOCX, TXT, CSV, XLSX
+
+    Returns immediately with a job_id; poll /jobs/{job_id} for the result.
     """
 
     try:
-        # Save uploaded file
-        file_path = os.path.join(settings.upload_dir, file.filename)
+        # Reject unsupported formats before accepting the upload
+        document_processor.get_document_type(file.filename)
 
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        # Save uploaded file under a per-job name so concurrent same-name uploads don't clobber each other
+        job_id = secrets.token_hex(16)
+        file_path = os.path.join(settings.upload_dir, f"{job_id}_{os.path.basename(file.filename)}")
 
-        # Process document
-        metadata, chunks = document_processor.process_document(
-            file_path=file_path,
-            filename=file.filename
-        )
+        async with aiofiles.open(file_path, "wb") as buffer:
+            while chunk := await file.read(1 << 20):
+                await buffer.write(chunk)
 
-        # Add to vector store
-        vector_store.add_documents(chunks)
+        jobs[job_id] = JobResponse(job_id=job_id, status=JobStatus.QUEUED)
+        background_tasks.add_task(_process_and_index, file_path, file.filename, job_id)
 
         return UploadResponse(
             success=True,
-            message=f"Document '{file.filename}' uploaded and processed successfully. {len(chunks)} chunks created.",
-            document_metadata=metadata
+            message=f"Document '{file.filename}' uploaded and queued for processing.",
+            job_id=job_id
         )
 
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error processing document: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error uploading document: {str(e)}")
+
+
+async def _process_and_index(file_path: str, filename: str, job_id: str) -> None:
+    """Process an uploaded document and add its chunks to the vector store"""
+
+    jobs[job_id] = JobResponse(job_id=job_id, status=JobStatus.PROCESSING)
+
+    try:
+        # Process document off the event loop
+        metadata, chunks = await asyncio.to_thread(
+            document_processor.process_document,
+            file_path=file_path,
+            filename=filename
+        )
+
+        # Add to vector store
+        await vector_store.add_documents(chunks)
+
+        jobs[job_id] = JobResponse(
+            job_id=job_id,
+            status=JobStatus.COMPLETED,
+            message=f"Document '{filename}' uploaded and processed successfully. {len(chunks)} chunks created.",
+            document_metadata=metadata
+        )
+
+    except Exception as e:
+        jobs[job_id] = JobResponse(
+            job_id=job_id,
+            status=JobStatus.FAILED,
+            message=f"Error processing document: {str(e)}"
+        )
+
+
+@app.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str):
+    """Get the status of a document ingestion job"""
+    job = jobs.get(job_id)
+    if job:
+        return job
+    else:
+        raise HTTPException(status_code=404, detail="Job not found")
 
 
 @app.post("/query")
@@ -111,7 +191,7 @@ async def query_documents(query_request: QueryRequest):
     """
 
     try:
-        clarification_response, answer_response = clara_engine.process_query(query_request)
+        clarification_response, answer_response = await clara_engine.process_query(query_request)
 
         if clarification_response:
             return clarification_response
@@ -122,6 +202,35 @@ async def query_documents(query_request: QueryRequest):
         raise HTTPException(status_code=500, detail=f"Error processing query: {str(e)}")
 
 
+@app.post("/query/stream")
+async def query_documents_stream(query_request: QueryRequest):
+    """
+    Query documents using ClaRA approach, streaming the answer as Server-Sent Events
+
+    Events:
+    - clarification: clarification questions if query is ambiguous
+    - sources: retrieved document chunks
+    - token: answer text delta
+    - done: conversation_id, confidence_score and used_clarifications
+    - error: error detail
+    """
+
+    async def event_stream():
+        try:
+            async for event, data in clara_engine.stream_query(query_request):
+                if event == "clarification":
+                    payload = data.model_dump_json()
+                elif event == "sources":
+                    payload = orjson.dumps([doc.model_dump(mode="json") for doc in data]).decode()
+                else:
+                    payload = orjson.dumps(data).decode()
+                yield f"event: {event}\ndata: {payload}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {orjson.dumps(f'Error processing query: {str(e)}').decode()}\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
 @app.get("/documents")
 async def list_documents():
     """List all uploaded documents"""
@@ -136,7 +245,8 @@ async def list_documents():
 async def delete_document(document_id: str):
     """Delete a specific document"""
     try:
-        vector_store.delete_document(document_id)
+        # Index deletes block (and may rebuild the FAISS index), so run them off the loop
+        await asyncio.to_thread(vector_store.delete_document, document_id)
         return {"success": True, "message": f"Document {document_id} deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deleting document: {str(e)}")
@@ -146,7 +256,7 @@ async def delete_document(document_id: str):
 async def clear_all_documents():
     """Clear all documents from the system"""
     try:
-        vector_store.clear_all()
+        await asyncio.to_thread(vector_store.clear_all)
         return {"success": True, "message": "All documents cleared successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error clearing documents: {str(e)}")
@@ -155,7 +265,7 @@ async def clear_all_documents():
 @app.get("/conversation/{conversation_id}")
 async def get_conversation(conversation_id: str):
     """Get conversation history"""
-    conversation = clara_engine.get_conversation(conversation_id)
+    conversation = await clara_engine.get_conversation(conversation_id)
     if conversation:
         return conversation
     else:
@@ -165,7 +275,7 @@ async def get_conversation(conversation_id: str):
 @app.delete("/conversation/{conversation_id}")
 async def clear_conversation(conversation_id: str):
     """Clear conversation history"""
-    clara_engine.clear_conversation(conversation_id)
+    await clara_engine.clear_conversation(conversation_id)
     return {"success": True, "message": f"Conversation {conversation_id} cleared"}
 
 
@@ -178,9 +288,21 @@ if static_dir.exists():
 # ============ Main Entry Point ============
 
 if __name__ == "__main__":
+    # Workers would share the content file, the FAISS index file and its payload
+    # table while each buffers and persists writes on its own, corrupting them
+    if not settings.debug and settings.workers > 1:
+        raise ValueError(
+            "WORKERS > 1 is not supported: worker processes cannot safely share the "
+            "content store and FAISS index in VECTOR_DB_DIR"
+        )
+
     uvicorn.run(
         "main:app",
         host=settings.host,
         port=settings.port,
-        reload=settings.debug
+        reload=settings.debug,
+        loop="asyncio" if settings.debug else "uvloop",
+        http="httptools",
+        # Reload mode always runs a single worker
+        workers=1 if settings.debug else settings.workers
     )
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Literal
 from datetime import datetime
 from enum import Enum
 
@@ -46,6 +46,39 @@ class ClarificationResponse(BaseModel):
     reasoning: Optional[str] = None
 
 
+class ClarificationQuestionSchema(BaseModel):
+    """Clarifying question as returned by the LLM"""
+    question_text: str = Field(description="The clarifying question")
+    question_type: Literal["open", "multiple_choice"]
+    suggested_options: Optional[List[str]] = Field(
+        default=None,
+        description="Options to choose from (only for multiple_choice)"
+    )
+
+
+class AmbiguitySchema(BaseModel):
+    """Structured LLM output for query ambiguity analysis"""
+    needs_clarification: bool
+    reasoning: str = Field(description="Why clarification is/isn't needed")
+    questions: List[ClarificationQuestionSchema]
+
+
+class AnswerSchema(BaseModel):
+    """Structured LLM output for answer generation"""
+    answer: str = Field(description="Detailed, helpful answer")
+    confidence_score: float = Field(description="Confidence from 0.0 to 1.0")
+    reasoning: str = Field(description="Brief explanation of the confidence level")
+
+
+class ClarifyOrAnswerSchema(BaseModel):
+    """Structured LLM output for the combined clarify-or-answer call"""
+    mode: Literal["clarify", "answer"]
+    reasoning: str = Field(description="Why clarification is/isn't needed, or the confidence level")
+    questions: List[ClarificationQuestionSchema] = Field(description="Clarifying questions (only for clarify mode)")
+    answer: str = Field(description="Detailed, helpful answer (only for answer mode)")
+    confidence_score: float = Field(description="Confidence from 0.0 to 1.0")
+
+
 class DocumentChunk(BaseModel):
     """A chunk of document with metadata"""
     chunk_id: str
@@ -60,6 +93,8 @@ class RetrievedDocument(BaseModel):
     chunk: DocumentChunk
     relevance_score: float
     reasoning: Optional[str] = None
+    # Prompt-ready text, precomputed at retrieval time (not serialized)
+    formatted: Optional[str] = Field(default=None, exclude=True)
 
 
 class AnswerResponse(BaseModel):
@@ -75,6 +110,23 @@ class UploadResponse(BaseModel):
     """Document upload response"""
     success: bool
     message: str
+    job_id: Optional[str] = None
+    document_metadata: Optional[DocumentMetadata] = None
+
+
+class JobStatus(str, Enum):
+    """Document ingestion job states"""
+    QUEUED = "queued"
+    PROCESSING = "processing"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class JobResponse(BaseModel):
+    """Document ingestion job status"""
+    job_id: str
+    status: JobStatus
+    message: Optional[str] = None
     document_metadata: Optional[DocumentMetadata] = None
 
 
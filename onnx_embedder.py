@@ -0,0 +1,96 @@
+import os
+from typing import List, Optional, Union
+
+import numpy as np
+import onnxruntime as ort
+from transformers import AutoTokenizer
+
+
+class OnnxEmbedder:
+    """
+    SentenceTransformer-compatible encoder running an INT8 ONNX export
+
+    Produces mean-pooled sentence embeddings from a model exported with
+    export_embedder.py, on the CPU execution provider.
+    """
+
+    def __init__(
+        self,
+        model_dir: str,
+        model_file: str = "model.int8.onnx",
+        max_seq_length: int = 256,
+        intra_op_num_threads: Optional[int] = None
+    ):
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.max_seq_length = max_seq_length
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_num_threads or os.cpu_count() or 1
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, model_file),
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+        self._input_names = [model_input.name for model_input in self.session.get_inputs()]
+        self._dimension = self.session.get_outputs()[0].shape[-1]
+
+    def encode(
+        self,
+        sentences: Union[str, List[str]],
+        batch_size: int = 32,
+        show_progress_bar: bool = False,
+        convert_to_numpy: bool = True,
+        normalize_embeddings: bool = False,
+        **kwargs
+    ) -> np.ndarray:
+        """Encode sentences into embeddings, mirroring SentenceTransformer.encode"""
+
+        single = isinstance(sentences, str)
+        if single:
+            sentences = [sentences]
+
+        batches = []
+        for start in range(0, len(sentences), batch_size):
+            tokens = self.tokenizer(
+                sentences[start:start + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors="np"
+            )
+            batches.append(self._forward(tokens))
+
+        embeddings = (
+            np.vstack(batches) if batches
+            else np.zeros((0, self.get_sentence_embedding_dimension()), dtype=np.float32)
+        )
+
+        if normalize_embeddings:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.clip(norms, 1e-12, None)
+
+        return embeddings[0] if single else embeddings
+
+    def get_sentence_embedding_dimension(self) -> int:
+        """Embedding dimension of the exported model"""
+        if not isinstance(self._dimension, int):
+            self._dimension = self.encode("dimension probe").shape[-1]
+        return self._dimension
+
+    def encode_tokens(self, tokens, normalize_embeddings: bool = False) -> np.ndarray:
+        """Encode already-tokenized inputs (numpy arrays keyed by input name)"""
+        embeddings = self._forward(tokens)
+        if normalize_embeddings:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.clip(norms, 1e-12, None)
+        return embeddings
+
+    def _forward(self, tokens) -> np.ndarray:
+        """Run the ONNX model and mean-pool token embeddings over the attention mask"""
+
+        feeds = {name: tokens[name].astype(np.int64) for name in self._input_names if name in tokens}
+        token_embeddings = self.session.run(None, feeds)[0]
+
+        mask = tokens["attention_mask"][..., None].astype(np.float32)
+        summed = (token_embeddings * mask).sum(axis=1)
+        return (summed / np.clip(mask.sum(axis=1), 1e-9, None)).astype(np.float32)
@@ -0,0 +1,48 @@
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Tuple
+
+
+class TokenRateLimiter:
+    """
+    Sliding-window limiter on LLM tokens per minute
+
+    Callers wait until usage over the window is below the limit, then
+    record the tokens reported by the provider once the response arrives.
+    A limit of 0 disables limiting.
+    """
+
+    def __init__(self, tokens_per_minute: int, window_seconds: float = 60.0):
+        self.tokens_per_minute = tokens_per_minute
+        self.window_seconds = window_seconds
+        self._usage: Deque[Tuple[float, int]] = deque()
+        self._used = 0
+
+    async def wait(self) -> None:
+        """Wait until the window has token budget left"""
+
+        if self.tokens_per_minute <= 0:
+            return
+
+        while True:
+            now = time.monotonic()
+            self._expire(now)
+            if self._used < self.tokens_per_minute:
+                return
+            await asyncio.sleep(self._usage[0][0] + self.window_seconds - now)
+
+    def record(self, tokens: int) -> None:
+        """Record tokens consumed by a completed request"""
+
+        if self.tokens_per_minute <= 0 or tokens <= 0:
+            return
+
+        self._usage.append((time.monotonic(), tokens))
+        self._used += tokens
+
+    def _expire(self, now: float) -> None:
+        """Drop usage that has left the window"""
+        while self._usage and self._usage[0][0] <= now - self.window_seconds:
+            _, tokens = self._usage.popleft()
+            self._used -= tokens
@@ -0,0 +1,135 @@
+import time
+from typing import Hashable, List, Optional
+
+import faiss
+import numpy as np
+
+
+class SemanticCache:
+    """
+    Semantic cache for LLM responses
+
+    Entries are keyed by the embedding of a lookup text and matched by
+    cosine similarity, so near-identical prompts reuse a prior response.
+    Callers embed the lookup text once and pass the vector to get and set.
+    An optional namespace must match exactly (e.g. the retrieved chunk ids).
+    Entries expire after a TTL and the least recently used entry is evicted
+    once the cache is full.
+    """
+
+    duplicate_threshold: float = 0.95
+
+    def __init__(
+        self,
+        dim: int,
+        threshold: float,
+        max_size: int = 1000,
+        ttl_seconds: float = 300.0,
+        search_k: int = 8
+    ):
+        self.threshold = threshold
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.search_k = search_k
+
+        self.index = faiss.IndexFlatIP(dim)
+        self._embeddings: List[np.ndarray] = []
+        self._responses: List[str] = []
+        self._namespaces: List[Hashable] = []
+        self._expires_at: List[float] = []
+        self._last_access: List[float] = []
+
+    def get(self, embedding: np.ndarray, namespace: Hashable = None) -> Optional[str]:
+        """Return a cached response for a semantically similar embedding, if any"""
+
+        idx, _ = self._best_match(self._normalize(embedding), namespace, self.threshold)
+        if idx is None:
+            return None
+
+        self._last_access[idx] = time.monotonic()
+        return self._responses[idx]
+
+    def set(self, embedding: np.ndarray, response: str, namespace: Hashable = None) -> None:
+        """Store a response, updating a near-duplicate entry instead of inserting"""
+
+        embedding = self._normalize(embedding)
+        now = time.monotonic()
+
+        idx, _ = self._best_match(embedding, namespace, self.duplicate_threshold)
+        if idx is not None:
+            self._responses[idx] = response
+            self._expires_at[idx] = now + self.ttl_seconds
+            self._last_access[idx] = now
+            return
+
+        if len(self._responses) >= self.max_size:
+            self._evict(now)
+
+        self.index.add(embedding[None, :])
+        self._embeddings.append(embedding)
+        self._responses.append(response)
+        self._namespaces.append(namespace)
+        self._expires_at.append(now + self.ttl_seconds)
+        self._last_access.append(now)
+
+    def clear(self) -> None:
+        """Remove all cached entries"""
+        self.index.reset()
+        self._embeddings.clear()
+        self._responses.clear()
+        self._namespaces.clear()
+        self._expires_at.clear()
+        self._last_access.clear()
+
+    def __len__(self) -> int:
+        return len(self._responses)
+
+    def _normalize(self, embedding: np.ndarray) -> np.ndarray:
+        """L2-normalize an embedding so inner product equals cosine similarity"""
+        embedding = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(embedding)
+        if norm > 0:
+            embedding = embedding / norm
+        return embedding
+
+    def _best_match(
+        self,
+        embedding: np.ndarray,
+        namespace: Hashable,
+        threshold: float
+    ):
+        """Find the most similar live entry in the namespace above threshold"""
+
+        if self.index.ntotal == 0:
+            return None, 0.0
+
+        k = min(self.search_k, self.index.ntotal)
+        similarities, indices = self.index.search(embedding[None, :], k)
+        now = time.monotonic()
+
+        for similarity, idx in zip(similarities[0], indices[0]):
+            if idx < 0 or similarity <= threshold:
+                break
+            if self._namespaces[idx] == namespace and self._expires_at[idx] > now:
+                return int(idx), float(similarity)
+
+        return None, 0.0
+
+    def _evict(self, now: float) -> None:
+        """Drop expired entries, or the least recently used one if none expired"""
+
+        keep = [i for i, expires_at in enumerate(self._expires_at) if expires_at > now]
+        if len(keep) == len(self._expires_at):
+            lru = min(range(len(self._last_access)), key=self._last_access.__getitem__)
+            keep.remove(lru)
+
+        self._embeddings = [self._embeddings[i] for i in keep]
+        self._responses = [self._responses[i] for i in keep]
+        self._namespaces = [self._namespaces[i] for i in keep]
+        self._expires_at = [self._expires_at[i] for i in keep]
+        self._last_access = [self._last_access[i] for i in keep]
+
+        # IndexFlatIP positions must stay aligned with the parallel lists
+        self.index.reset()
+        if self._embeddings:
+            self.index.add(np.vstack(self._embeddings))
@@ -70,14 +70,25 @@ The system meets all performance and reliability requirements.
         files = {"file": ("test_document.txt", f, "text/plain")}
         response = requests.post(f"{BASE_URL}/upload", files=files)
 
-    if response.status_code == 200:
-        result = response.json()
+    if response.status_code != 202:
+        print(f"❌ Upload failed: {response.text}")
+        return False
+
+    # Processing runs in the background; poll the job until it finishes
+    job_id = response.json()['job_id']
+    while True:
+        result = requests.get(f"{BASE_URL}/jobs/{job_id}").json()
+        if result['status'] not in ("queued", "processing"):
+            break
+        time.sleep(0.5)
+
+    if result['status'] == "completed":
         print("✅ Upload successful")
         print(f"   Message: {result['message']}")
         print(f"   Chunks created: {result['document_metadata']['num_chunks']}")
         return True
     else:
-        print(f"❌ Upload failed: {response.text}")
+        print(f"❌ Upload failed: {result['message']}")
         return False
 
 
@@ -1,19 +1,104 @@
+import asyncio
+import copy
+import os
+import hashlib
+import heapq
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
 import chromadb
 from chromadb.config import Settings as ChromaSettings
 from sentence_transformers import SentenceTransformer
-from typing import List, Tuple, Dict, Any
+from typing import List, Set, Tuple, Dict, Any, Optional
 import numpy as np
+import orjson
+from numba import njit, prange
+import pandas as pd
+import torch
 
 from models import DocumentChunk, RetrievedDocument
+from embedding_cache import EmbeddingCache
+from embedding_batcher import EmbeddingBatcher
+from onnx_embedder import OnnxEmbedder
+from faiss_index import FaissChunkIndex
+from content_store import ContentStore
+from int8_code_store import Int8CodeStore
 from config import settings
 
 
+logger = logging.getLogger(__name__)
+
+
+# Metadata keys that held int8 re-ranking codes on chunks written by older versions
+INT8_CODES_KEY = "embedding_int8"
+INT8_SCALE_KEY = "embedding_scale"
+# Metadata keys locating the chunk text in the content store
+CONTENT_OFFSET_KEY = "content_offset"
+CONTENT_LENGTH_KEY = "content_length"
+
+
+def quantize_int8(embeddings: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Symmetric per-vector int8 quantization, returning (codes, scales)"""
+    embeddings = np.atleast_2d(embeddings).astype(np.float32)
+    scales = np.abs(embeddings).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.round(embeddings / scales[:, None]).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def int8_similarities(codes, scales, query_codes, query_scale):
+    """Rescaled int8 dot products of each candidate with the query"""
+    out = np.empty(codes.shape[0], dtype=np.float32)
+    for i in prange(codes.shape[0]):
+        acc = 0
+        for j in range(codes.shape[1]):
+            acc += np.int32(codes[i, j]) * np.int32(query_codes[j])
+        out[i] = acc * scales[i] * query_scale
+    return out
+
+
+def lock_directory(directory: str):
+    """
+    Take an exclusive lock on a data directory, failing fast if another process holds it
+
+    The lock is held until the returned file is closed or the process exits.
+    """
+
+    lock_file = open(os.path.join(directory, ".lock"), "a+")
+    try:
+        if os.name == "nt":
+            import msvcrt
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        raise RuntimeError(
+            f"{directory} is in use by another process. The content store and FAISS index "
+            "support a single writer, so run one server worker per VECTOR_DB_DIR"
+        ) from None
+    return lock_file
+
+
+def format_retrieved_chunk(relevance_score: float, content: str) -> str:
+    """Format a retrieved chunk for inclusion in an LLM prompt"""
+    return f"(Relevance: {relevance_score:.2f})\n{content}"
+
+
 class VectorStore:
     """Vector store for document embeddings using ChromaDB"""
 
     def __init__(self):
         """Initialize vector store and embedding model"""
 
+        # Every store below is written by this process alone; refuse to share them
+        # with another worker (e.g. uvicorn or gunicorn --workers N)
+        self._directory_lock = lock_directory(settings.vector_db_dir)
+
         # Initialize ChromaDB
         self.client = chromadb.PersistentClient(
             path=settings.vector_db_dir,
@@ -23,16 +108,142 @@ class VectorStore:
             )
         )
 
-        # Get or create collection
-        self.collection = self.client.get_or_create_collection(
-            name="clara_documents",
-            metadata={"hnsw:space": "cosine"}
+        # Get or create collections, one per shard (documents are assigned by id hash)
+        shard_names = (
+            ["clara_documents"] if settings.chroma_shards <= 1
+            else [f"clara_documents_shard_{i}" for i in range(settings.chroma_shards)]
+        )
+        self.collections = [
+            self.client.get_or_create_collection(name=name, metadata={"hnsw:space": "cosine"})
+            for name in shard_names
+        ]
+        self._shard_executor: Optional[ThreadPoolExecutor] = None
+        if len(self.collections) > 1:
+            self._shard_executor = ThreadPoolExecutor(max_workers=len(self.collections))
+
+        # Initialize embedding model (INT8 ONNX export if configured)
+        # Token-budgeted batches are encoded this many at a time on the ONNX CPU path
+        encode_workers = max((os.cpu_count() or 2) // 2, 1)
+
+        if settings.onnx_embedding_dir:
+            # Split the cores between parallel batches instead of oversubscribing them
+            self.embedding_model = OnnxEmbedder(
+                settings.onnx_embedding_dir,
+                intra_op_num_threads=max((os.cpu_count() or 1) // encode_workers, 1)
+            )
+        else:
+            self.embedding_model = SentenceTransformer(settings.embedding_model)
+            # Half precision halves memory bandwidth on GPU; CPU stays FP32
+            if torch.cuda.is_available():
+                self.embedding_model.half()
+
+        # Cache chunk embeddings by content hash so re-uploads skip the model
+        # (keys are scoped to the active model so switching models never reuses vectors)
+        model_id = f"onnx:{settings.onnx_embedding_dir}" if settings.onnx_embedding_dir else settings.embedding_model
+        self._cache_key_prefix = model_id.encode("utf-8") + b"\0"
+        self.embedding_cache: Optional[EmbeddingCache] = None
+        if settings.enable_embedding_cache:
+            self.embedding_cache = EmbeddingCache(
+                os.path.join(settings.vector_db_dir, "embedding_cache.sqlite3")
+            )
+
+        # Chunk texts live in an mmap-read file rather than in the indexes
+        self.content_store = ContentStore(os.path.join(settings.vector_db_dir, "content.bin"))
+
+        # Int8 re-ranking codes are kept out of the chunk metadata
+        self.int8_codes: Optional[Int8CodeStore] = None
+        if settings.enable_int8_rerank:
+            self.int8_codes = Int8CodeStore(os.path.join(settings.vector_db_dir, "int8_codes.sqlite3"))
+
+        # Chunks waiting to be written to the indexes in one batch; the lock only
+        # guards the buffers and is never held while writing
+        self._write_lock = threading.Lock()
+        # Serializes batch writes; only taken by flushing worker threads
+        self._flush_lock = threading.Lock()
+        # Documents in the batch being written, and those deleted meanwhile (whose
+        # chunks the flush removes again once its write has finished)
+        self._writing_documents: Set[str] = set()
+        self._deleted_while_writing: Set[str] = set()
+        # Futures of uploads waiting for their chunks to be written (kept across
+        # deletes and clears, so waiting uploads are always released)
+        self._pending_futures: List[asyncio.Future] = []
+        self._reset_pending()
+
+        # (chunk count, documents) from the last get_all_documents call
+        self._documents_cache: Optional[Tuple[int, List[Dict[str, Any]]]] = None
+
+        # Ring buffer of recent (query embedding, results), matched by cosine similarity
+        dim = self.embedding_model.get_sentence_embedding_dimension()
+        self._qcache_size = settings.query_result_cache_size if settings.enable_query_result_cache else 0
+        self._qcache_vecs = np.zeros((self._qcache_size, dim), dtype=np.float32)
+        self._qcache_results: List[Optional[Tuple[Any, List[RetrievedDocument]]]] = [None] * self._qcache_size
+        self._qcache_head = 0
+        # Bumped whenever the indexed chunks change, so searches that overlap a
+        # write don't cache results from before it
+        self._qcache_generation = 0
+
+        # In-process ANN index so unfiltered searches skip the ChromaDB round-trip
+        self.faiss_index: Optional[FaissChunkIndex] = None
+        if settings.enable_faiss_index:
+            self.faiss_index = FaissChunkIndex(
+                settings.vector_db_dir,
+                dim=dim,
+                hnsw_m=settings.faiss_hnsw_m
+            )
+            # The index file is only saved periodically, so after a crash it can
+            # miss chunks the payload table already has; rebuild it from ChromaDB
+            if self._count() > 0 and (len(self.faiss_index) == 0 or not self.faiss_index.has_all_vectors()):
+                self.faiss_index.clear()
+                self._load_faiss_index_from_chroma()
+                self.faiss_index.save()
+
+        # A fast tokenizer must mutate its padding/truncation state whenever a call
+        # uses different settings, which fails ("Already borrowed") while another
+        # thread is encoding with it. The query and length-counting paths each get
+        # their own copy; the model's tokenizer is only used by encode().
+        self._query_tokenizer = copy.deepcopy(self.embedding_model.tokenizer)
+        self._length_tokenizer = copy.deepcopy(self.embedding_model.tokenizer)
+
+        # With ONNX Runtime, token-budgeted batches are encoded in parallel on split
+        # thread pools; PyTorch already spreads one encode over every core, so
+        # parallel calls there would only oversubscribe the CPU
+        self._encode_executor: Optional[ThreadPoolExecutor] = None
+        if isinstance(self.embedding_model, OnnxEmbedder):
+            self._encode_executor = ThreadPoolExecutor(max_workers=encode_workers)
+
+        # Coalesce embedding calls from concurrent uploads and queries
+        self.embedding_batcher = EmbeddingBatcher(
+            self._encode,
+            max_batch_tokens=settings.embedding_batch_max_tokens,
+            linger_seconds=settings.embedding_batch_linger_ms / 1000
         )
+        # Queries get their own batches, padded to a fixed length
+        self.query_batcher = EmbeddingBatcher(
+            self._encode_queries,
+            max_batch_tokens=settings.embedding_batch_max_tokens,
+            linger_seconds=settings.embedding_batch_linger_ms / 1000
+        )
+
+    def warmup(self) -> None:
+        """Run representative encodes so the first request skips cold-start costs"""
 
-        # Initialize embedding model
-        self.embedding_model = SentenceTransformer(settings.embedding_model)
+        if (
+            settings.compile_embedding_model
+            and torch.cuda.is_available()
+            and hasattr(torch, "compile")
+            and isinstance(self.embedding_model, SentenceTransformer)
+        ):
+            # reduce-overhead captures a CUDA graph per input shape, so inputs
+            # padded to a fixed length (see _encode_queries) reuse one graph
+            transformer = self.embedding_model[0]
+            transformer.auto_model = torch.compile(transformer.auto_model, mode="reduce-overhead")
 
-    def add_documents(self, chunks: List[DocumentChunk]) -> None:
+        # The first calls trigger compilation and kernel autotuning
+        for _ in range(3):
+            self.embedding_model.encode(["x" * 32] * 8, batch_size=8, show_progress_bar=False)
+            self._encode_queries(["x" * 32])
+
+    async def add_documents(self, chunks: List[DocumentChunk]) -> None:
         """Add document chunks to the vector store"""
 
         if not chunks:
@@ -51,109 +262,599 @@ class VectorStore:
         ]
 
         # Generate embeddings
-        embeddings = self.embedding_model.encode(
+        embeddings = await self._embed_documents(documents)
+
+        # Buffer the chunks so small uploads share one index write; the future
+        # resolves once the batch holding them has been written
+        written = asyncio.get_running_loop().create_future()
+        with self._write_lock:
+            self._pending_ids.extend(ids)
+            self._pending_embeddings.append(embeddings)
+            self._pending_documents.extend(documents)
+            self._pending_metadatas.extend(metadatas)
+            self._pending_futures.append(written)
+
+        await self.flush()
+
+        # Return only once the chunks are searchable, forcing the write if the
+        # periodic flush has not picked them up in time
+        try:
+            await asyncio.wait_for(asyncio.shield(written), settings.write_flush_interval_seconds)
+        except asyncio.TimeoutError:
+            await self.flush(force=True)
+            await written
+
+    async def flush(self, force: bool = False) -> None:
+        """Write buffered chunks once enough have accumulated (or always, if forced)"""
+
+        # Index writes are blocking, so keep them off the event loop
+        flushed = await asyncio.to_thread(self._maybe_flush, force)
+        if flushed is None:
+            return
+
+        # Report the outcome to every upload in the batch (a failed batch may
+        # still have been written in part)
+        futures, error = flushed
+        self._documents_cache = None
+        self._clear_cached_results()
+        for future in futures:
+            if future.done():
+                continue
+            if error is None:
+                future.set_result(None)
+            else:
+                future.set_exception(error)
+
+    async def run_periodic_flush(self) -> None:
+        """Flush buffered chunks every write_flush_interval_seconds"""
+        while True:
+            await asyncio.sleep(settings.write_flush_interval_seconds)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Periodic flush of buffered chunks failed")
+
+    async def run_periodic_save(self) -> None:
+        """Persist the FAISS index every faiss_save_interval_seconds"""
+        while True:
+            await asyncio.sleep(settings.faiss_save_interval_seconds)
+            try:
+                await asyncio.to_thread(self.save)
+            except Exception:
+                logger.exception("Periodic save of the FAISS index failed")
+
+    def save(self) -> None:
+        """Persist in-memory indexes that are not written on every change"""
+        if self.faiss_index is not None:
+            self.faiss_index.save()
+
+    def _maybe_flush(self, force: bool = False) -> Optional[Tuple[List[asyncio.Future], Optional[Exception]]]:
+        """
+        Write buffered chunks when the buffer is full or stale
+
+        Returns None if nothing was due, otherwise the futures of the uploads
+        in the batch and the write error, if any. A failed batch is dropped;
+        its uploads receive the error.
+        """
+
+        with self._flush_lock:
+            # Swap the buffers out, then write without holding the buffer lock
+            with self._write_lock:
+                if not self._pending_ids and not self._pending_futures:
+                    self._last_flush = time.monotonic()
+                    return None
+
+                due = (
+                    force
+                    or len(self._pending_ids) >= settings.write_batch_size
+                    or time.monotonic() - self._last_flush >= settings.write_flush_interval_seconds
+                )
+                if not due:
+                    return None
+
+                futures, self._pending_futures = self._pending_futures, []
+                ids, embeddings = self._pending_ids, self._pending_embeddings
+                documents, metadatas = self._pending_documents, self._pending_metadatas
+                self._reset_pending()
+                self._writing_documents = {metadata["document_id"] for metadata in metadatas}
+
+            error = None
+            if ids:
+                try:
+                    self._write_chunks(ids, np.vstack(embeddings), documents, metadatas)
+                except Exception as e:
+                    error = e
+
+            # Deletes that ran during the write could not see this batch
+            with self._write_lock:
+                deleted, self._deleted_while_writing = self._deleted_while_writing, set()
+                self._writing_documents = set()
+            for document_id in deleted:
+                try:
+                    self._delete_written(document_id)
+                except Exception:
+                    logger.exception("Deleting chunks of document %s written during its deletion failed", document_id)
+
+            return futures, error
+
+    def _reset_pending(self) -> None:
+        self._pending_ids: List[str] = []
+        self._pending_embeddings: List[np.ndarray] = []
+        self._pending_documents: List[str] = []
+        self._pending_metadatas: List[Dict[str, Any]] = []
+        self._last_flush = time.monotonic()
+
+    def _write_chunks(
+        self,
+        ids: List[str],
+        embeddings: np.ndarray,
+        documents: List[str],
+        metadatas: List[Dict[str, Any]]
+    ) -> None:
+        """Write embedded chunks to the content store, ChromaDB and the FAISS index"""
+
+        # The indexes keep only the location of each chunk's text
+        for metadata, (offset, length) in zip(metadatas, self.content_store.append(documents)):
+            metadata[CONTENT_OFFSET_KEY] = offset
+            metadata[CONTENT_LENGTH_KEY] = length
+
+        # Add to each ChromaDB shard, which only accepts nested lists: convert one
+        # batch at a time so the Python floats for a whole upload never exist at once
+        shards: Dict[int, List[int]] = {}
+        for i, metadata in enumerate(metadatas):
+            shards.setdefault(self._shard_index(metadata["document_id"]), []).append(i)
+
+        batch_size = self.client.max_batch_size
+        for shard, rows in shards.items():
+            for start in range(0, len(rows), batch_size):
+                batch = rows[start:start + batch_size]
+                self.collections[shard].add(
+                    ids=[ids[i] for i in batch],
+                    embeddings=embeddings[batch].tolist(),
+                    metadatas=[metadatas[i] for i in batch]
+                )
+
+        if self.faiss_index is not None:
+            self.faiss_index.add(ids, embeddings, [""] * len(ids), metadatas)
+
+        # Keep an int8 copy with its scale for re-ranking search candidates
+        if self.int8_codes is not None:
+            codes, scales = quantize_int8(embeddings)
+            self.int8_codes.put_many(ids, [metadata["document_id"] for metadata in metadatas], codes, scales)
+
+    def _load_faiss_index_from_chroma(self) -> None:
+        """Populate the FAISS index from chunks already stored in ChromaDB"""
+
+        for collection in self.collections:
+            results = collection.get(include=["embeddings", "documents", "metadatas"])
+            if results['ids']:
+                self.faiss_index.add(
+                    results['ids'],
+                    np.asarray(results['embeddings'], dtype=np.float32),
+                    [document or "" for document in results['documents']],
+                    results['metadatas']
+                )
+
+    def _shard_index(self, document_id: str) -> int:
+        """Shard holding a document's chunks (stable across processes, unlike hash())"""
+        if len(self.collections) == 1:
+            return 0
+        digest = hashlib.blake2b(document_id.encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "big") % len(self.collections)
+
+    def _count(self) -> int:
+        """Total chunks across all shards"""
+        return sum(collection.count() for collection in self.collections)
+
+    async def _embed_documents(self, documents: List[str]) -> np.ndarray:
+        """Embed document texts, reusing cached embeddings for known content"""
+
+        if self.embedding_cache is None:
+            return await self.embedding_batcher.embed(documents)
+
+        keys = [hashlib.sha256(self._cache_key_prefix + doc.encode("utf-8")).digest() for doc in documents]
+        cached = self.embedding_cache.get_many(keys)
+
+        # Encode each distinct uncached text once
+        missing = {}
+        for key, doc in zip(keys, documents):
+            if key not in cached and key not in missing:
+                missing[key] = doc
+
+        if missing:
+            new_embeddings = await self.embedding_batcher.embed(list(missing.values()))
+            new_items = list(zip(missing.keys(), new_embeddings))
+            self.embedding_cache.put_many(new_items)
+            cached.update(new_items)
+
+        return np.vstack([cached[key] for key in keys])
+
+    def _encode(self, documents: List[str]) -> np.ndarray:
+        """Run the embedding model over document texts in token-budgeted batches"""
+
+        if len(documents) <= 1:
+            return self._encode_batch(documents)
+
+        # Group similar lengths together so batches carry little padding
+        lengths = np.asarray(self._token_lengths(documents))
+        order = np.argsort(lengths, kind="stable")
+        batches = self._token_batches(order, lengths)
+
+        batch_texts = [[documents[i] for i in batch] for batch in batches]
+        if self._encode_executor is not None and len(batches) > 1:
+            results = list(self._encode_executor.map(self._encode_batch, batch_texts))
+        else:
+            results = [self._encode_batch(texts) for texts in batch_texts]
+
+        # Restore the callers' order
+        embeddings = np.empty((len(documents), results[0].shape[1]), dtype=np.float32)
+        embeddings[np.concatenate(batches)] = np.vstack(results)
+        return embeddings
+
+    def _encode_batch(self, documents: List[str]) -> np.ndarray:
+        """Run the embedding model over document texts in a single batched call"""
+        return self.embedding_model.encode(
             documents,
+            batch_size=max(len(documents), 1),
             show_progress_bar=False,
-            convert_to_numpy=True
-        ).tolist()
-
-        # Add to ChromaDB
-        self.collection.add(
-            ids=ids,
-            embeddings=embeddings,
-            documents=documents,
-            metadatas=metadatas
-        )
+            convert_to_numpy=True,
+            normalize_embeddings=True
+        ).astype(np.float32)
+
+    def _encode_queries(self, queries: List[str]) -> np.ndarray:
+        """
+        Embed short queries padded to a fixed token length
+
+        Every batch has shape (n, query_token_length), so compiled graphs and
+        ONNX Runtime shape specializations are reused across queries. Batches
+        with a longer query fall back to the regular dynamic-length path.
+        """
+
+        length = settings.query_token_length
+        tokens = self._query_tokenizer(queries, padding="max_length", max_length=length)
+        if any(len(input_ids) != length for input_ids in tokens["input_ids"]):
+            return self._encode_batch(queries)
+
+        tokens = {name: np.asarray(values, dtype=np.int64) for name, values in tokens.items()}
 
-    def search(
+        if isinstance(self.embedding_model, OnnxEmbedder):
+            return self.embedding_model.encode_tokens(tokens, normalize_embeddings=True)
+
+        features = {name: torch.from_numpy(values).to(self.embedding_model.device) for name, values in tokens.items()}
+        with torch.inference_mode():
+            embeddings = self.embedding_model(features)["sentence_embedding"]
+        embeddings = torch.nn.functional.normalize(embeddings.float(), dim=1)
+        return embeddings.cpu().numpy()
+
+    def _token_lengths(self, documents: List[str]) -> List[int]:
+        """Tokenized length of each text, truncated as the model would"""
+        # Only the lengths are needed, so skip building the mask and type-id lists
+        return self._length_tokenizer(
+            documents,
+            truncation=True,
+            max_length=self.embedding_model.max_seq_length,
+            return_attention_mask=False,
+            return_token_type_ids=False,
+            return_length=True
+        )["length"]
+
+    @staticmethod
+    def _token_batches(order: np.ndarray, lengths: np.ndarray) -> List[np.ndarray]:
+        """Greedily split length-sorted indices into batches within the padded-token budget"""
+
+        batches = []
+        start = 0
+        for end in range(1, len(order) + 1):
+            if end == len(order):
+                batches.append(order[start:end])
+                break
+            # Sorted ascending, so the next text sets the padded length
+            size = end + 1 - start
+            padded = size * max(int(lengths[order[end]]), 1)
+            if padded > settings.embedding_token_budget or size > settings.embedding_batch_size:
+                batches.append(order[start:end])
+                start = end
+
+        return batches
+
+    async def search(
         self,
         query: str,
         top_k: int = None,
-        filter_dict: Dict[str, Any] = None
+        filter_dict: Dict[str, Any] = None,
+        query_embedding: Optional[np.ndarray] = None
     ) -> List[RetrievedDocument]:
-        """Search for relevant document chunks"""
+        """Search for relevant document chunks (query_embedding, if given, is the query's embedding)"""
 
         if top_k is None:
             top_k = settings.top_k_documents
 
         # Generate query embedding
-        query_embedding = self.embedding_model.encode(
-            query,
-            show_progress_bar=False,
-            convert_to_numpy=True
-        ).tolist()
-
-        # Search in ChromaDB
-        results = self.collection.query(
-            query_embeddings=[query_embedding],
-            n_results=top_k,
-            where=filter_dict
+        if query_embedding is None:
+            query_embedding = (await self.query_batcher.embed([query]))[0]
+
+        # Near-duplicate queries with the same parameters reuse recent results
+        cache_key = (top_k, orjson.dumps(filter_dict, option=orjson.OPT_SORT_KEYS) if filter_dict else None)
+        cached = self._get_cached_results(query_embedding, cache_key)
+        if cached is not None:
+            return cached
+
+        # Over-fetch candidates when re-ranking
+        n_candidates = top_k * settings.rerank_candidates_multiplier if self.int8_codes is not None else top_k
+
+        generation = self._qcache_generation
+
+        # Index searches block, so run them off the loop
+        ids, documents, metadatas, similarities = await asyncio.to_thread(
+            self._search_candidates, query_embedding, n_candidates, filter_dict
         )
 
         # Convert results to RetrievedDocument objects
         retrieved_docs = []
 
-        if results['ids'] and results['ids'][0]:
-            for i in range(len(results['ids'][0])):
+        if ids:
+            # Select the top_k before sorting only those
+            order = np.arange(len(similarities))
+            if len(order) > top_k:
+                order = np.argpartition(-similarities, top_k - 1)[:top_k]
+            order = order[np.argsort(-similarities[order], kind="stable")]
+
+            for chunk_id, metadata, content, relevance_score in zip(
+                [ids[i] for i in order],
+                [metadatas[i] for i in order],
+                [documents[i] for i in order],
+                similarities[order].tolist()
+            ):
+                # Result metadatas are fresh copies, so strip internal (and legacy) keys in place
+                metadata.pop(INT8_CODES_KEY, None)
+                metadata.pop(INT8_SCALE_KEY, None)
+                # Decode only the returned chunks (older chunks still carry their text)
+                if CONTENT_OFFSET_KEY in metadata:
+                    content = self.content_store.read(
+                        metadata.pop(CONTENT_OFFSET_KEY),
+                        metadata.pop(CONTENT_LENGTH_KEY)
+                    )
                 chunk = DocumentChunk(
-                    chunk_id=results['ids'][0][i],
-                    document_id=results['metadatas'][0][i]['document_id'],
-                    content=results['documents'][0][i],
-                    chunk_index=results['metadatas'][0][i]['chunk_index'],
-                    metadata=results['metadatas'][0][i]
+                    chunk_id=chunk_id,
+                    document_id=metadata['document_id'],
+                    content=content,
+                    chunk_index=metadata['chunk_index'],
+                    metadata=metadata
                 )
-
-                retrieved_doc = RetrievedDocument(
+                retrieved_docs.append(RetrievedDocument(
                     chunk=chunk,
-                    relevance_score=1.0 - results['distances'][0][i]  # Convert distance to similarity
-                )
+                    relevance_score=relevance_score,
+                    formatted=format_retrieved_chunk(relevance_score, content)
+                ))
 
-                retrieved_docs.append(retrieved_doc)
+        if generation == self._qcache_generation:
+            self._cache_results(query_embedding, cache_key, retrieved_docs)
 
         return retrieved_docs
 
+    def _get_cached_results(self, query_embedding: np.ndarray, cache_key: Any) -> Optional[List[RetrievedDocument]]:
+        """Results of a recent search with a near-identical query embedding, if any"""
+
+        if not self._qcache_size:
+            return None
+
+        similarities = self._qcache_vecs @ query_embedding
+        for slot in np.argsort(-similarities):
+            if similarities[slot] < settings.query_result_cache_threshold:
+                break
+            entry = self._qcache_results[slot]
+            if entry is not None and entry[0] == cache_key:
+                return list(entry[1])
+
+        return None
+
+    def _cache_results(
+        self,
+        query_embedding: np.ndarray,
+        cache_key: Any,
+        results: List[RetrievedDocument]
+    ) -> None:
+        """Store search results, overwriting the oldest slot"""
+
+        if not self._qcache_size:
+            return
+
+        self._qcache_vecs[self._qcache_head] = query_embedding
+        self._qcache_results[self._qcache_head] = (cache_key, results)
+        self._qcache_head = (self._qcache_head + 1) % self._qcache_size
+
+    def _clear_cached_results(self) -> None:
+        """Forget cached search results once the indexed chunks change"""
+        self._qcache_generation += 1
+        self._qcache_vecs[:] = 0
+        self._qcache_results = [None] * self._qcache_size
+        self._qcache_head = 0
+
+    def _search_candidates(
+        self,
+        query_embedding: np.ndarray,
+        n_candidates: int,
+        filter_dict: Optional[Dict[str, Any]]
+    ) -> Tuple[List[str], List[str], List[Dict[str, Any]], np.ndarray]:
+        """Nearest chunks as (ids, documents, metadatas, similarities)"""
+
+        # Metadata filters still go through ChromaDB
+        if self.faiss_index is not None and not filter_dict:
+            ids, documents, metadatas, distances = self.faiss_index.search(query_embedding, n_candidates)
+        else:
+            ids, documents, metadatas, distances = self._search_chroma(query_embedding, n_candidates, filter_dict)
+
+        return ids, documents, metadatas, self._candidate_similarities(query_embedding, ids, distances)
+
+    def _search_chroma(
+        self,
+        query_embedding: np.ndarray,
+        n_results: int,
+        filter_dict: Optional[Dict[str, Any]]
+    ) -> Tuple[List[str], List[str], List[Dict[str, Any]], List[float]]:
+        """Query every ChromaDB shard, returning the merged (ids, documents, metadatas, distances)"""
+
+        query_embeddings = [query_embedding.tolist()]
+
+        def query_shard(collection):
+            return collection.query(
+                query_embeddings=query_embeddings,
+                n_results=n_results,
+                where=filter_dict
+            )
+
+        if self._shard_executor is not None:
+            shard_results = list(self._shard_executor.map(query_shard, self.collections))
+        else:
+            shard_results = [query_shard(collection) for collection in self.collections]
+
+        candidates = [
+            hit
+            for results in shard_results
+            if results['ids'] and results['ids'][0]
+            for hit in zip(
+                results['distances'][0],
+                results['ids'][0],
+                results['documents'][0],
+                results['metadatas'][0]
+            )
+        ]
+        if not candidates:
+            return [], [], [], []
+
+        # Keep the nearest n_results across shards
+        merged = heapq.nsmallest(n_results, candidates, key=itemgetter(0))
+        distances, ids, documents, metadatas = (list(column) for column in zip(*merged))
+        return ids, documents, metadatas, distances
+
+    def _candidate_similarities(
+        self,
+        query_embedding: np.ndarray,
+        ids: List[str],
+        distances: List[float]
+    ) -> np.ndarray:
+        """Cosine similarity per candidate, from int8 codes where available"""
+
+        # Convert distance to similarity
+        similarities = 1.0 - np.asarray(distances, dtype=np.float32)
+
+        if self.int8_codes is None or not ids:
+            return similarities
+
+        stored = self.int8_codes.get_many(ids)
+        rows = [i for i, chunk_id in enumerate(ids) if chunk_id in stored]
+        if not rows:
+            return similarities
+
+        # Join straight into one contiguous [candidates, dim] buffer for the kernel
+        codes = np.frombuffer(
+            b"".join(stored[ids[i]][0] for i in rows),
+            dtype=np.int8
+        ).reshape(len(rows), -1)
+        scales = np.array([stored[ids[i]][1] for i in rows], dtype=np.float32)
+        query_codes, query_scale = quantize_int8(query_embedding)
+
+        similarities[rows] = int8_similarities(codes, scales, query_codes[0], query_scale[0])
+
+        return similarities
+
     def delete_document(self, document_id: str) -> None:
         """Delete all chunks of a document"""
 
-        # Query all chunks with this document_id
-        results = self.collection.get(
+        with self._write_lock:
+            # Drop chunks of the document that have not been written yet
+            keep = [i for i, metadata in enumerate(self._pending_metadatas) if metadata["document_id"] != document_id]
+            if len(keep) < len(self._pending_ids):
+                embeddings = np.vstack(self._pending_embeddings)[keep]
+                self._pending_ids = [self._pending_ids[i] for i in keep]
+                self._pending_embeddings = [embeddings] if keep else []
+                self._pending_documents = [self._pending_documents[i] for i in keep]
+                self._pending_metadatas = [self._pending_metadatas[i] for i in keep]
+
+            # Chunks in the batch being written land after this delete; the flush removes them
+            if document_id in self._writing_documents:
+                self._deleted_while_writing.add(document_id)
+
+        self._delete_written(document_id)
+
+        self._documents_cache = None
+        self._clear_cached_results()
+
+    def _delete_written(self, document_id: str) -> None:
+        """Delete a document's chunks from ChromaDB and the FAISS index"""
+
+        # Only the document's shard holds its chunks; delete them by filter
+        # rather than fetching their ids first
+        self.collections[self._shard_index(document_id)].delete(
             where={"document_id": document_id}
         )
 
-        if results['ids']:
-            self.collection.delete(ids=results['ids'])
+        if self.faiss_index is not None:
+            self.faiss_index.delete_document(document_id)
+
+        if self.int8_codes is not None:
+            self.int8_codes.delete_document(document_id)
 
     def get_all_documents(self) -> List[Dict[str, Any]]:
         """Get all document metadata"""
 
-        results = self.collection.get()
+        # Reuse the last aggregation until chunks are added or removed
+        count = self._count()
+        if self._documents_cache is not None and self._documents_cache[0] == count:
+            return self._documents_cache[1]
+
+        metadatas = [
+            metadata
+            for collection in self.collections
+            for metadata in collection.get(include=["metadatas"])['metadatas'] or []
+        ]
 
         # Extract unique documents
-        documents = {}
-        if results['metadatas']:
-            for metadata in results['metadatas']:
-                doc_id = metadata['document_id']
-                if doc_id not in documents:
-                    documents[doc_id] = {
-                        'document_id': doc_id,
-                        'source_file': metadata.get('source_file', 'Unknown'),
-                        'chunks': 0
-                    }
-                documents[doc_id]['chunks'] += 1
-
-        return list(documents.values())
+        documents = []
+        if metadatas:
+            df = pd.DataFrame(metadatas)
+            if 'source_file' not in df:
+                df['source_file'] = 'Unknown'
+            documents = (
+                df.fillna({'source_file': 'Unknown'})
+                .groupby('document_id', sort=False)
+                .agg(source_file=('source_file', 'first'), chunks=('document_id', 'size'))
+                .reset_index()
+                .to_dict('records')
+            )
+
+        self._documents_cache = (count, documents)
+        return documents
 
     def clear_all(self) -> None:
         """Clear all documents from the vector store"""
-        self.client.delete_collection("clara_documents")
-        self.collection = self.client.get_or_create_collection(
-            name="clara_documents",
-            metadata={"hnsw:space": "cosine"}
-        )
+
+        with self._write_lock:
+            self._reset_pending()
+            # A batch being written lands after the clear; the flush removes it
+            self._deleted_while_writing |= self._writing_documents
+
+        # Delete the rows but keep the collections (and their index files) in place
+        batch_size = self.client.max_batch_size
+        for collection in self.collections:
+            ids = collection.get(include=[])['ids']
+            for start in range(0, len(ids), batch_size):
+                collection.delete(ids=ids[start:start + batch_size])
+
+        if self.faiss_index is not None:
+            self.faiss_index.clear()
+
+        if self.int8_codes is not None:
+            self.int8_codes.clear()
+
+        self.content_store.clear()
+
+        self._documents_cache = None
+        self._clear_cached_results()
 
     def get_collection_stats(self) -> Dict[str, Any]:
         """Get statistics about the collection"""
-        count = self.collection.count()
+        count = self._count()
         documents = self.get_all_documents()
 
         return {